@@ -0,0 +1,21 @@
+-- Migration to text-embedding-3-small at 512 dims. Existing rows hold
+-- 1536-d ada-002 vectors that cannot be compared against the new model,
+-- so the columns are recreated and rows must be re-embedded by
+-- store_chunks before similarity search returns results again.
+drop index if exists chunks_embedding_h_hnsw;
+
+alter table public.chunks
+drop column if exists embedding;
+
+alter table public.chunks
+add column embedding vector (512);
+
+alter table public.chunks
+drop column if exists embedding_h;
+
+alter table public.chunks
+add column embedding_h halfvec (512);
+
+create index if not exists chunks_embedding_h_hnsw on public.chunks using hnsw (embedding_h halfvec_cosine_ops)
+with
+  (m = 16, ef_construction = 64);
@@ -0,0 +1,17 @@
+-- float16 halves per-row embedding storage and index memory; pgvector
+-- supports the same distance operators on halfvec
+alter table public.chunks
+  add column if not exists embedding_h halfvec (1536);
+
+update public.chunks
+set
+  embedding_h = embedding::halfvec (1536)
+where
+  embedding is not null
+  and embedding_h is null;
+
+drop index if exists chunks_embedding_hnsw;
+
+create index if not exists chunks_embedding_h_hnsw on public.chunks using hnsw (embedding_h halfvec_cosine_ops)
+with
+  (m = 16, ef_construction = 64);
@@ -0,0 +1,7 @@
+-- hnsw requires fixed dimensions; ada-002 embeddings are 1536-d
+alter table public.chunks
+  alter column embedding type vector (1536);
+
+create index if not exists chunks_embedding_hnsw on public.chunks using hnsw (embedding vector_cosine_ops)
+with
+  (m = 16, ef_construction = 64);
@@ -0,0 +1,9 @@
+create table
+  public.doc_variables (
+    document_id integer not null,
+    name text not null,
+    value text not null,
+    updated_at timestamptz not null default now(),
+    constraint doc_variables_pkey primary key (document_id, name),
+    constraint doc_variables_document_id_fkey foreign key (document_id) references documents (document_id)
+  ) tablespace pg_default;
@@ -0,0 +1,12 @@
+-- Sized for text-embedding-3-small at 512 dims. Caches from the
+-- ada-002 era hold 1536-d vectors and must be cleared before altering
+-- an existing table to this definition; the model name in the cache
+-- key already prevents false hits across models.
+create table
+  public.embedding_cache (
+    hash text not null,
+    model text not null,
+    embedding public.vector (512) not null,
+    created_at timestamptz not null default now(),
+    constraint embedding_cache_pkey primary key (hash)
+  ) tablespace pg_default;
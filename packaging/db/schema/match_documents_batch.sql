@@ -0,0 +1,32 @@
+create or replace function match_documents_batch (
+  query_embeddings vector[],
+  match_threshold float,
+  match_count int,
+  filter_document_id int
+) returns table (
+  query_idx int,
+  id int,
+  text text,
+  similarity float,
+  start_page_number int
+) language sql stable as $$
+  select
+    q.idx - 1 as query_idx,
+    c.id,
+    c.text,
+    c.similarity,
+    c.start_page_number
+  from unnest(query_embeddings) with ordinality as q (embedding, idx),
+  lateral (
+    select
+      chunks.id,
+      chunks.text,
+      1 - (chunks.embedding_h <=> q.embedding::halfvec (512)) as similarity,
+      chunks.start_page_number
+    from public.chunks
+    where chunks.document_id = filter_document_id
+      and 1 - (chunks.embedding_h <=> q.embedding::halfvec (512)) > match_threshold
+    order by chunks.embedding_h <=> q.embedding::halfvec (512)
+    limit match_count
+  ) as c
+$$;
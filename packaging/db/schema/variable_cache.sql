@@ -0,0 +1,10 @@
+create table
+  public.variable_cache (
+    document_id integer not null,
+    var_name text not null,
+    prompt_sha text not null,
+    answer text not null,
+    created_at timestamptz not null default now(),
+    constraint variable_cache_pkey primary key (document_id, var_name, prompt_sha),
+    constraint variable_cache_document_id_fkey foreign key (document_id) references documents (document_id)
+  ) tablespace pg_default;
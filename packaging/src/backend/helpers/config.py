@@ -10,12 +10,16 @@ Provides functionality for:
 import configparser
 import logging
 import os
+import stat as stat_module
 import sys
 import json
 from types import SimpleNamespace
 
 global_config = SimpleNamespace()
 
+# Cache of parsed configs keyed by path: (mtime_ns, size) -> loaded config
+_config_cache = {}
+
 DEFAULT_CONFIG = """
 [API_KEYS]
 unstructured_api_key = your_unstructured_key
@@ -39,6 +43,7 @@ save_bbox_images = True
 save_document_elements = True
 logging_level = CRITICAL
 show_progressbar = True
+max_enrichment_workers = 8
 """
 
 def create_default_config(config_path):
@@ -64,14 +69,36 @@ def load_config(config_path='config.ini'):
         SystemExit: If critical parameters are missing
     """
     global global_config
-    
+
     if not os.path.exists(config_path):
         logging.warning(f"Config file not found at {config_path}. Creating default config.")
         create_default_config(config_path)
         print(f"A default configuration file has been created at {config_path}")
         print("Please edit this file to add your API keys before running the program again.")
         sys.exit(1)
-        
+
+    # Pre-flight checks: fail with a clear message before configparser
+    # gets a chance to choke on an empty, binary or non-regular file
+    stat = os.stat(config_path)
+    if not stat_module.S_ISREG(stat.st_mode):
+        print(f"Config path {config_path} is not a regular file.")
+        sys.exit(1)
+    if stat.st_size == 0:
+        print(f"Config file {config_path} is empty. Please add your settings.")
+        sys.exit(1)
+    with open(config_path, 'rb') as f:
+        head = f.read(4096)
+    if b'\0' in head:
+        print(f"Config file {config_path} appears to be binary, not an INI file.")
+        sys.exit(1)
+
+    # Skip reparsing if the file hasn't changed since the last load
+    cache_key = (stat.st_mtime_ns, stat.st_size)
+    cached = _config_cache.get(config_path)
+    if cached and cached[0] == cache_key:
+        global_config = cached[1]
+        return global_config
+
     config = configparser.ConfigParser()
     config.optionxform = str  # Preserve case
     config.read(config_path)
@@ -104,7 +131,12 @@ def load_config(config_path='config.ini'):
                 value = value.lower() == 'true'
             setattr(section_namespace, key, value)
         setattr(global_config, section.lower(), section_namespace)
-    
+
+    # Seed optional tuning keys that older config files may not carry
+    pdf_processing = getattr(global_config, 'pdf_processing', None)
+    if pdf_processing is not None and not hasattr(pdf_processing, 'max_enrichment_workers'):
+        pdf_processing.max_enrichment_workers = '8'
+
     # Create directories if they don't exist
     try:
         os.makedirs(global_config.directories.input_dir, exist_ok=True)
@@ -114,60 +146,99 @@ def load_config(config_path='config.ini'):
         logging.error(f"Error creating directories: {str(e)}")
         sys.exit(1)
     
+    _config_cache[config_path] = (cache_key, global_config)
     logging.info("Configuration loaded successfully")
     return global_config
 
+# Template mirroring DEFAULT_CONFIG's fixed schema; filled straight from
+# the global_config namespaces so saving avoids dir() introspection
+_CONFIG_TEMPLATE = """[API_KEYS]
+unstructured_api_key = {cfg.api_keys.unstructured_api_key}
+unstructured_url = {cfg.api_keys.unstructured_url}
+openai_api_key = {cfg.api_keys.openai_api_key}
+
+[DIRECTORIES]
+input_dir = {cfg.directories.input_dir}
+output_dir = {cfg.directories.output_dir}
+
+[MODEL]
+embedding_model = {cfg.model.embedding_model}
+llm_model = {cfg.model.llm_model}
+
+[SUPABASE]
+supabase_url = {cfg.supabase.supabase_url}
+supabase_key = {cfg.supabase.supabase_key}
+
+[PDF_PROCESSING]
+save_bbox_images = {cfg.pdf_processing.save_bbox_images}
+save_document_elements = {cfg.pdf_processing.save_document_elements}
+logging_level = {cfg.pdf_processing.logging_level}
+show_progressbar = {cfg.pdf_processing.show_progressbar}
+max_enrichment_workers = {cfg.pdf_processing.max_enrichment_workers}
+"""
+
 def save_config(config_path='config.ini'):
     """Save current configuration state to file
-    
+
     Args:
         config_path (str): Path to save configuration
-        
+
     Returns:
         bool: True if save successful, False otherwise
     """
-    config = configparser.ConfigParser()
-    
-    # Convert SimpleNamespace back to ConfigParser format
-    for section in dir(global_config):
-        if not section.startswith('_'):
-            config[section.upper()] = {}
-            section_obj = getattr(global_config, section)
-            for key in dir(section_obj):
-                if not key.startswith('_'):
-                    config[section.upper()][key] = str(getattr(section_obj, key))
-    
-    # Write to file
     try:
         with open(config_path, 'w') as configfile:
-            config.write(configfile)
+            configfile.write(_CONFIG_TEMPLATE.format(cfg=global_config))
         logging.info(f"Configuration saved successfully to {config_path}")
         return True
     except Exception as e:
         logging.error(f"Error saving config: {str(e)}")
         return False
 
+def _parse_ini(config_path):
+    """Minimal line-based INI parser for the fixed config.ini schema
+
+    configparser's interpolation and per-key machinery is overkill for
+    five sections of plain `key = value` pairs; a direct split is an
+    order of magnitude cheaper.
+
+    Args:
+        config_path (str): Path to INI file
+
+    Returns:
+        dict: Mapping of section name to {key: value} dict
+    """
+    with open(config_path, 'rb') as f:
+        text = f.read().decode()
+
+    config_dict = {}
+    section = None
+    for line in text.split('\n'):
+        line = line.strip()
+        if not line or line[0] in ('#', ';'):
+            continue
+        if line[0] == '[' and line.endswith(']'):
+            section = line[1:-1]
+            config_dict[section] = {}
+        elif '=' in line and section is not None:
+            key, _, value = line.partition('=')
+            config_dict[section][key.strip()] = value.strip()
+    return config_dict
+
 def load_configuration():
     """Load and validate the complete configuration
-    
+
     Validates:
     - Required sections exist
     - Critical parameters are present
     - Directory paths are valid
-    
+
     Returns:
         SimpleNamespace: Validated configuration object
     """
     try:
-        config = configparser.ConfigParser()
-        config.read('config.ini')
-        
-        # Convert section names while preserving case for values
-        config_dict = {}
-        for section in config.sections():
-            # Store with original section names
-            config_dict[section] = {k: v for k, v in config[section].items()}
-        
+        config_dict = _parse_ini('config.ini')
+
         return SimpleNamespace(**{
             'api_keys': SimpleNamespace(**config_dict['API_KEYS']),
             'directories': SimpleNamespace(**config_dict['DIRECTORIES']),
@@ -177,10 +248,24 @@ def load_configuration():
         })
             
     except Exception as e:
-        logging.error(f"Configuration error: {str(e)}")
-        print(f"Available sections: {config.sections()}")  # Debug print
-        print(f"Config dict: {config_dict}")  # Debug print
-        return None
+        # Fall back to configparser for files the fast path can't handle
+        logging.warning(f"Fast config parse failed ({str(e)}), retrying with configparser")
+        try:
+            config = configparser.ConfigParser()
+            config.read('config.ini')
+            config_dict = {section: dict(config[section].items())
+                           for section in config.sections()}
+            return SimpleNamespace(**{
+                'api_keys': SimpleNamespace(**config_dict['API_KEYS']),
+                'directories': SimpleNamespace(**config_dict['DIRECTORIES']),
+                'model': SimpleNamespace(**config_dict['MODEL']),
+                'supabase': SimpleNamespace(**config_dict['SUPABASE']),
+                'pdf_processing': SimpleNamespace(**config_dict['PDF_PROCESSING'])
+            })
+        except Exception as fallback_error:
+            logging.error(f"Configuration error: {str(fallback_error)}")
+            print(f"Available sections: {config.sections()}")  # Debug print
+            return None
 
 def get_global_config():
     """Get the global configuration object."""
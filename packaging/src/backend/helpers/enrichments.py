@@ -11,8 +11,12 @@ Provides functionality to enhance JSON data with:
 - Text element tagging and enrichment
 """
 
+import hashlib
 import logging
-from openai import OpenAI
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from openai import OpenAI, APIConnectionError, APITimeoutError, RateLimitError
 import json
 from .config import global_config
 import os
@@ -21,12 +25,95 @@ from rich.progress import Progress, SpinnerColumn, TextColumn
 import base64
 import re
 
+try:
+    import orjson
+except ImportError:
+    orjson = None  # Fall back to the stdlib json module
+
 # Initialize the logger
 logging.basicConfig(level=logging.ERROR)
 logger = logging.getLogger(__name__)
 
 console = Console()
 
+# Concurrent in-flight OpenAI requests; enrichment is latency-bound, so
+# this should track the account's rate limit rather than CPU count
+MAX_ENRICHMENT_WORKERS = 16
+
+# Attempts per OpenAI call before giving up on transient failures
+MAX_API_RETRIES = 6
+
+def _call_with_backoff(func, *args):
+    """Call an OpenAI helper, retrying transient failures
+
+    Rate-limit, connection, and timeout errors are retried with
+    randomized exponential backoff so one throttled request doesn't
+    stall its sibling workers; other errors propagate immediately.
+
+    Args:
+        func: Enrichment function to call
+        *args: Arguments forwarded to func
+    """
+    delay = 1.0
+    for attempt in range(MAX_API_RETRIES):
+        try:
+            return func(*args)
+        except (RateLimitError, APIConnectionError, APITimeoutError) as e:
+            if attempt == MAX_API_RETRIES - 1:
+                raise
+            wait = delay + random.uniform(0, delay)
+            logger.warning(
+                f"OpenAI call failed ({str(e)}), retrying in {wait:.1f}s "
+                f"(attempt {attempt + 1}/{MAX_API_RETRIES})"
+            )
+            time.sleep(wait)
+            delay = min(delay * 2, 30.0)
+
+# Shared OpenAI client, created on first use so every enrichment call
+# reuses one connection pool instead of constructing a client per request
+_openai_client = None
+
+def _get_openai_client():
+    """Return the memoized OpenAI client, creating it on first call"""
+    global _openai_client
+    if _openai_client is None:
+        _openai_client = OpenAI(api_key=global_config.api_keys.openai_api_key)
+    return _openai_client
+
+# On-disk cache of LLM responses keyed by content hash, so reprocessing a
+# document skips the API round-trip for elements that haven't changed
+_ENRICH_CACHE_DIR = './.enrich_cache'
+
+def _cache_key(content):
+    """Hash element content (text or base64 image data) to a cache key"""
+    data = content if isinstance(content, bytes) else content.encode()
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+def _cache_lookup(kind, content):
+    """Return the cached enrichment result for content, or None on miss
+
+    Args:
+        kind (str): Cache namespace (one per enrichment function)
+        content: Element content the result was derived from
+    """
+    cache_path = os.path.join(_ENRICH_CACHE_DIR, kind, f"{_cache_key(content)}.txt")
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            return f.read()
+    except OSError:
+        return None
+
+def _cache_store(kind, content, result):
+    """Store an enrichment result under the content's hash key"""
+    try:
+        cache_dir = os.path.join(_ENRICH_CACHE_DIR, kind)
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(os.path.join(cache_dir, f"{_cache_key(content)}.txt"),
+                  'w', encoding='utf-8') as f:
+            f.write(result)
+    except OSError as e:
+        logger.warning(f"Could not write enrichment cache entry: {str(e)}")
+
 def summarize_table(table_image_base64):
     """Generate a text summary of a table using GPT-4 Vision
     
@@ -36,7 +123,11 @@ def summarize_table(table_image_base64):
     Returns:
         str: Natural language summary of table contents
     """
-    client = OpenAI(api_key=global_config.api_keys.openai_api_key)
+    cached = _cache_lookup('summarize_table', table_image_base64)
+    if cached is not None:
+        return cached
+
+    client = _get_openai_client()
     
     prompt = """You are a table analyzing agent. Please analyze the table and give me a series of paragraphs for each data row. 
     I want you to describe in brief the content of each field and clearly call out the values from the table for that field. Include all the details for each field; please do not miss on any crucial information. 
@@ -81,21 +172,26 @@ def summarize_table(table_image_base64):
         max_tokens=1500,
         temperature=0
     )
-    
-    return response.choices[0].message.content.strip()
+
+    summary = response.choices[0].message.content.strip()
+    _cache_store('summarize_table', table_image_base64, summary)
+    return summary
 
 
 
-def enrich_json_with_summaries(json_file):
+def enrich_json_with_summaries(json_file, show_progress=True):
     """Process JSON data to add summaries and semantic enrichments
-    
+
     Enhances JSON with:
     - Image descriptions
-    - Table summaries  
+    - Table summaries
     - Semantic text tagging
-    
+
     Args:
         json_file: Path to JSON file to enrich
+        show_progress: Show the live progress display; callers running
+            several files at once disable it, since concurrent rich
+            displays garble each other's terminal output
     """
     def enrich_text(text_content):
         """Add semantic XML-style tags to text content
@@ -112,12 +208,14 @@ def enrich_json_with_summaries(json_file):
         Returns:
             str: Text with semantic tags added
         """
-        client = OpenAI(api_key=global_config.api_keys.openai_api_key)
-        
-        # Debug print before enrichment
-        print("\nBEFORE ENRICHMENT:")
-        print(f"Text: {text_content[:200]}...")
-        
+        cached = _cache_lookup('enrich_text', text_content)
+        if cached is not None:
+            return cached
+
+        client = _get_openai_client()
+
+        logger.debug("Text before enrichment: %.200s...", text_content)
+
         prompt = """You are a precise text tagging agent. Your task is to add XML-style tags around EXISTING text elements in the document. 
         
         Rules:
@@ -170,27 +268,33 @@ def enrich_json_with_summaries(json_file):
         )
         
         enriched_text = response.choices[0].message.content.strip()
-        
-        # Debug print after enrichment
-        print("\nAFTER ENRICHMENT:")
-        print(f"Text: {enriched_text[:200]}...")
-        
+
+        logger.debug("Text after enrichment: %.200s...", enriched_text)
+
+        _cache_store('enrich_text', text_content, enriched_text)
         return enriched_text
 
     # Load JSON data
-    with open(json_file, 'r', encoding='utf-8') as f:
-        json_data = json.load(f)
-
-    # Retrieve lists of items to enrich
-    textElements = [item for item in json_data if item['type'] == 'NarrativeText']
-    imageElements = [item for item in json_data if item['type'] == 'Image']
-    tableElements = [item for item in json_data if item['type'] == 'Table']
-    titleElements = [item for item in json_data if item['type'] == 'Title']
+    with open(json_file, 'rb') as f:
+        raw = f.read()
+    json_data = orjson.loads(raw) if orjson is not None else json.loads(raw)
+
+    # Retrieve lists of items to enrich in a single pass over the data
+    buckets = {'NarrativeText': [], 'Image': [], 'Table': [], 'Title': []}
+    for item in json_data:
+        bucket = buckets.get(item.get('type'))
+        if bucket is not None:
+            bucket.append(item)
+    textElements = buckets['NarrativeText']
+    imageElements = buckets['Image']
+    tableElements = buckets['Table']
+    titleElements = buckets['Title']
     
     with Progress(
         SpinnerColumn(),
         TextColumn("[progress.description]{task.description}"),
-        transient=True
+        transient=True,
+        disable=not show_progress
     ) as progress:
         
         # Text processing
@@ -199,21 +303,29 @@ def enrich_json_with_summaries(json_file):
             total=len(textElements)
         )
 
-        for idx, item in enumerate(textElements, 1):
-            progress.update(task, description=f"Enriching text: {idx}/{len(textElements)}")
-            try:
-                text_content = item.get('text', '')
-                if text_content:
-                    enriched_text = enrich_text(text_content)
+        # Enrichment is network-bound, so run requests concurrently and
+        # write results back by index to preserve element order
+        with ThreadPoolExecutor(max_workers=MAX_ENRICHMENT_WORKERS) as executor:
+            futures = {
+                executor.submit(_call_with_backoff, enrich_text, item['text']): idx
+                for idx, item in enumerate(textElements)
+                if item.get('text', '')
+            }
+            done = 0
+            for future in as_completed(futures):
+                idx = futures[future]
+                done += 1
+                progress.update(task, description=f"Enriching text: {done}/{len(textElements)}")
+                try:
                     # Save enriched text back to the text field
-                    item['text'] = enriched_text
+                    textElements[idx]['text'] = future.result()
+                except Exception as e:
+                    # Log the error with context for debugging
+                    text_content = textElements[idx].get('text', '')
+                    error_context = text_content[:50] + "..." if len(text_content) > 50 else text_content
+                    console.print(f"Error processing text: {error_context} - {str(e)}", style="red")
+                    logger.error(f"Error processing text: {error_context} - {str(e)}")
                 progress.advance(task)
-                
-            except Exception as e:
-                # Log the error with context for debugging
-                error_context = text_content[:50] + "..." if len(text_content) > 50 else text_content
-                console.print(f"Error processing text: {error_context} - {str(e)}", style="red")
-                logger.error(f"Error processing text: {error_context} - {str(e)}")
         
         # Images
         task = progress.add_task(
@@ -221,26 +333,31 @@ def enrich_json_with_summaries(json_file):
             total=len(imageElements)
         )
 
-        for idx, item in enumerate(imageElements, 1):
-            progress.update(task, description=f"Enriching images: {idx}/{len(imageElements)}")
-            image_base64 = item['metadata']['image_base64']
-            if image_base64:
+        # Vision calls are independent, so keep several in flight; the
+        # backoff wrapper rides through 429s without stalling siblings
+        with ThreadPoolExecutor(max_workers=MAX_ENRICHMENT_WORKERS) as executor:
+            futures = {}
+            for idx, item in enumerate(imageElements):
+                image_base64 = item['metadata']['image_base64']
+                if image_base64:
+                    futures[executor.submit(
+                        _call_with_backoff, summarize_image, image_base64)] = idx
+                else:
+                    console.print(f"Skipping image without base64 data: {item.get('text', 'Unnamed image')}",
+                                style="yellow")
+            done = 0
+            for future in as_completed(futures):
+                idx = futures[future]
+                done += 1
+                progress.update(task, description=f"Enriching images: {done}/{len(imageElements)}")
                 try:
-                    summary = summarize_image(image_base64)
-                    print(f"Generated summary for image {idx}: {summary}")  # Debugging output
-                    item['text'] = summary
-
-                    # Save after each image is processed
-                    with open(json_file, 'w', encoding='utf-8') as f:
-                        json.dump(json_data, f, indent=2, ensure_ascii=False)
-                    
-                    progress.advance(task)
+                    summary = future.result()
+                    logger.debug("Generated summary for image %d: %s", idx + 1, summary)
+                    imageElements[idx]['text'] = summary
                 except Exception as e:
                     console.print(f"Error processing image: {str(e)}", style="red")
                     logger.error(f"Error processing image: {str(e)}")
-            else:
-                console.print(f"Skipping image without base64 data: {item.get('text', 'Unnamed image')}", 
-                            style="yellow")
+                progress.advance(task)
 
         # Tables
         task = progress.add_task(
@@ -248,25 +365,33 @@ def enrich_json_with_summaries(json_file):
             total=len(tableElements)
         )
 
-        for idx, item in enumerate(tableElements, 1):
-            progress.update(task, description=f"Enriching tables: {idx}/{len(tableElements)}")
-            try:
-                table_image_base64 = item['metadata']['image_base64']
+        with ThreadPoolExecutor(max_workers=MAX_ENRICHMENT_WORKERS) as executor:
+            futures = {}
+            for idx, item in enumerate(tableElements):
+                try:
+                    table_image_base64 = item['metadata']['image_base64']
+                except Exception as e:
+                    console.print(f"Error processing table: {str(e)}", style="red")
+                    logger.error(f"Error processing table: {str(e)}")
+                    continue
                 if table_image_base64:
-                    structured_data = summarize_table(table_image_base64)
-                    print(f"Generated summary for table {idx}: {structured_data}")  # Debugging output
+                    futures[executor.submit(
+                        _call_with_backoff, summarize_table, table_image_base64)] = idx
+            done = 0
+            for future in as_completed(futures):
+                idx = futures[future]
+                done += 1
+                progress.update(task, description=f"Enriching tables: {done}/{len(tableElements)}")
+                try:
+                    structured_data = future.result()
+                    logger.debug("Generated summary for table %d: %s", idx + 1, structured_data)
 
                     # Ensure the structured data is saved in the 'text' field
-                    item['text'] = structured_data
-
-                    # Save after each table is processed
-                    with open(json_file, 'w', encoding='utf-8') as f:
-                        json.dump(json_data, f, indent=2, ensure_ascii=False)
-                    
+                    tableElements[idx]['text'] = structured_data
+                except Exception as e:
+                    console.print(f"Error processing table: {str(e)}", style="red")
+                    logger.error(f"Error processing table: {str(e)}")
                 progress.advance(task)
-            except Exception as e:
-                console.print(f"Error processing table: {str(e)}", style="red")
-                logger.error(f"Error processing table: {str(e)}")
 
         # Add the title processing task after the existing tasks
         task = progress.add_task(
@@ -279,14 +404,9 @@ def enrich_json_with_summaries(json_file):
             try:
                 title_content = item['text']
                 enriched_title = enrich_title(title_content)
-                print(f"Generated enriched title {idx}: {enriched_title}")  # Debugging output
+                logger.debug("Generated enriched title %d: %s", idx, enriched_title)
 
                 item['text'] = enriched_title
-
-                # Save after each title is processed
-                with open(json_file, 'w', encoding='utf-8') as f:
-                    json.dump(json_data, f, indent=2, ensure_ascii=False)
-                
                 progress.advance(task)
             except Exception as e:
                 console.print(f"Error processing title: {str(e)}", style="red")
@@ -294,8 +414,12 @@ def enrich_json_with_summaries(json_file):
 
         # Final save of all changes
         try:
-            with open(json_file, 'w', encoding='utf-8') as f:
-                json.dump(json_data, f, indent=2, ensure_ascii=False)
+            if orjson is not None:
+                with open(json_file, 'wb') as f:
+                    f.write(orjson.dumps(json_data, option=orjson.OPT_INDENT_2))
+            else:
+                with open(json_file, 'w', encoding='utf-8') as f:
+                    json.dump(json_data, f, indent=2, ensure_ascii=False)
             console.print("Successfully saved all changes", style="green")
         except Exception as final_save_error:
             console.print(f"Error in final save: {str(final_save_error)}", style="red")
@@ -310,7 +434,11 @@ def summarize_image(image_base64):
     Returns:
         str: A text summary of the image content.
     """
-    client = OpenAI(api_key=global_config.api_keys.openai_api_key)
+    cached = _cache_lookup('summarize_image', image_base64)
+    if cached is not None:
+        return cached
+
+    client = _get_openai_client()
     
     prompt = """You are an image summarizing agent. I will be giving you an image and you will provide a summary describing 
     the image, starting with "An image", or "An illustration", or "A diagram:", or "A logo:" or "A symbol:". If it contains a part, 
@@ -338,93 +466,127 @@ def summarize_image(image_base64):
         max_tokens=300,
         temperature=0
     )
-    
-    return response.choices[0].message.content
+
+    summary = response.choices[0].message.content
+    _cache_store('summarize_image', image_base64, summary)
+    return summary
+
+# Precompiled enrich_title patterns - compiled once at import, reused per call
+
+# First pass - multi-word phrases
+_PHRASE_PATTERNS = [
+    # Multi-word legal terms
+    (re.compile(r'\b((?:license|service|maintenance|support|software|subscription)\s+(?:agreement|contract)s?)\b', re.IGNORECASE), '<LEGAL>'),
+
+    # Company names - match any capitalized multi-word sequence followed by company indicators
+    (re.compile(r'\b([A-Z][A-Za-z]*(?:\s+[A-Z][A-Za-z]*)+\s*(?:Inc\.|LLC|Ltd\.|Corp\.|Corporation|Company|Co\.|Holdings|Group)?)\b', re.IGNORECASE), '<COMPANY>'),
+
+    # Sample/Test companies or parties
+    (re.compile(r'\b((?:SAMPLE|TEST)\s+(?:LICENSOR|LICENSEE|VENDOR|CUSTOMER|SUPPLIER|CONTRACTOR|PARTNER|BUYER|SELLER|PARTY))\b', re.IGNORECASE), '<PARTY>')
+]
+
+# Second pass - single word patterns, one named group per tag type
+_SINGLE_WORD_TOKENS = [
+    # Individual legal terms (if not already part of a phrase)
+    ('LEGAL', r'\b(?:agreement|contract|license|amendment|addendum|deed|memorandum|terms|conditions)\b'),
+
+    # Individual business relationship terms
+    ('PARTY', r'\b(?:licensor|licensee|vendor|customer|supplier|contractor|partner|buyer|seller|party|parties)\b'),
+
+    # Product/Service keywords
+    ('PRODUCT', r'\b(?:service|product|software|platform|system|solution|equipment|goods)\b'),
+
+    # Status indicators
+    ('STATUS', r'\b(?:draft|final|revised|amended|executed|confidential|private)\b'),
+
+    # Date patterns
+    ('DATE', r'\b\d{1,2}[-/]\d{1,2}[-/]\d{2,4}\b|\b(?:Jan(?:uary)?|Feb(?:ruary)?|Mar(?:ch)?|Apr(?:il)?|May|Jun(?:e)?|Jul(?:y)?|Aug(?:ust)?|Sep(?:tember)?|Oct(?:ober)?|Nov(?:ember)?|Dec(?:ember)?)\s+\d{1,2},\s+\d{4}\b'),
+
+    # Reference/Version numbers
+    ('ID', r'\b[A-Z0-9]+-[A-Z0-9]+(?:-[A-Z0-9]+)*\b|\bv\d+(?:\.\d+)*\b|#\d+\b'),
+
+    # Territory/Jurisdiction
+    ('TERRITORY', r'\b(?:worldwide|global|international|national|regional|domestic)\b')
+]
+
+# All token lists folded into a single alternation so one scan of the
+# title covers every tag type; match.lastgroup names the winning tag
+_SINGLE_WORD_TAGS = re.compile(
+    '|'.join(f'(?P<{name}>{pattern})' for name, pattern in _SINGLE_WORD_TOKENS),
+    re.IGNORECASE
+)
+
+_HAS_CAPITAL = re.compile(r'[A-Z]')
+_PARTY_CONTEXT = re.compile(r'\b(licensor|licensee|vendor|customer)\b', re.IGNORECASE)
+
+def _apply_tag_replacements(text, replacements):
+    """Rebuild text once from non-overlapping (start, end, replacement) spans
+
+    Args:
+        text (str): Source text
+        replacements (list): (start, end, replacement) tuples in ascending order
+
+    Returns:
+        str: Text with all replacements applied in a single join
+    """
+    pieces = []
+    last = 0
+    for start, end, replacement in replacements:
+        pieces.append(text[last:start])
+        pieces.append(replacement)
+        last = end
+    pieces.append(text[last:])
+    return ''.join(pieces)
 
 # Add the new enrich_title function at the module level, after the existing functions
 def enrich_title(title_text):
     """
     Enriches title text with appropriate tags using rule-based processing.
-    
+
     Args:
         title_text (str): The title text to be enriched
-        
+
     Returns:
         str: Enriched title text with appropriate tags
     """
-    # First pass - identify and tag multi-word phrases
-    phrase_patterns = [
-        # Multi-word legal terms
-        (r'\b((?:license|service|maintenance|support|software|subscription)\s+(?:agreement|contract)s?)\b', '<LEGAL>'),
-        
-        # Company names - match any capitalized multi-word sequence followed by company indicators
-        (r'\b([A-Z][A-Za-z]*(?:\s+[A-Z][A-Za-z]*)+\s*(?:Inc\.|LLC|Ltd\.|Corp\.|Corporation|Company|Co\.|Holdings|Group)?)\b', '<COMPANY>'),
-        
-        # Sample/Test companies or parties
-        (r'\b((?:SAMPLE|TEST)\s+(?:LICENSOR|LICENSEE|VENDOR|CUSTOMER|SUPPLIER|CONTRACTOR|PARTNER|BUYER|SELLER|PARTY))\b', '<PARTY>')
-    ]
-    
-    # Apply phrase patterns first
+    # Apply phrase patterns first. Matches are applied back-to-front
+    # mutating in place: spans to the left stay valid, and the party
+    # context window deliberately sees tags already inserted by matches
+    # further right, which can demote an adjacent company to a plain
+    # <COMPANY> tag.
     enriched_text = title_text
-    for pattern, tag_type in phrase_patterns:
-        matches = re.finditer(pattern, enriched_text, re.IGNORECASE)
-        for match in reversed(list(matches)):
+    for pattern, tag_type in _PHRASE_PATTERNS:
+        for match in reversed(list(pattern.finditer(enriched_text))):
             start, end = match.span()
             matched_text = enriched_text[start:end]
             # Check if matched text looks like a company name (has capital letters)
-            if tag_type == '<COMPANY>' and not re.search(r'[A-Z]', matched_text):
+            if tag_type == '<COMPANY>' and not _HAS_CAPITAL.search(matched_text):
                 continue
             # For company names, also tag as PARTY if they appear to be a contract party
-            if tag_type == '<COMPANY>' and re.search(r'\b(licensor|licensee|vendor|customer)\b', enriched_text[max(0, start-10):end+10], re.IGNORECASE):
-                enriched_text = (
-                    enriched_text[:start] + 
-                    f"<COMPANY><PARTY>{matched_text}</PARTY></COMPANY>" +
-                    enriched_text[end:]
-                )
+            if tag_type == '<COMPANY>' and _PARTY_CONTEXT.search(enriched_text[max(0, start-10):end+10]):
+                replacement = f"<COMPANY><PARTY>{matched_text}</PARTY></COMPANY>"
             else:
-                enriched_text = (
-                    enriched_text[:start] + 
-                    f"{tag_type}{matched_text}</{tag_type.strip('<>')}" +
-                    enriched_text[end:]
-                )
-
-    # Second pass - single word patterns
-    single_word_patterns = [
-        # Individual legal terms (if not already part of a phrase)
-        (r'\b(agreement|contract|license|amendment|addendum|deed|memorandum|terms|conditions)\b', '<LEGAL>'),
-        
-        # Individual business relationship terms
-        (r'\b(licensor|licensee|vendor|customer|supplier|contractor|partner|buyer|seller|party|parties)\b', '<PARTY>'),
-        
-        # Product/Service keywords
-        (r'\b(service|product|software|platform|system|solution|equipment|goods)\b', '<PRODUCT>'),
-        
-        # Status indicators
-        (r'\b(draft|final|revised|amended|executed|confidential|private)\b', '<STATUS>'),
-        
-        # Date patterns
-        (r'\b\d{1,2}[-/]\d{1,2}[-/]\d{2,4}\b|\b(?:Jan(?:uary)?|Feb(?:ruary)?|Mar(?:ch)?|Apr(?:il)?|May|Jun(?:e)?|Jul(?:y)?|Aug(?:ust)?|Sep(?:tember)?|Oct(?:ober)?|Nov(?:ember)?|Dec(?:ember)?)\s+\d{1,2},\s+\d{4}\b', '<DATE>'),
-        
-        # Reference/Version numbers
-        (r'\b[A-Z0-9]+-[A-Z0-9]+(?:-[A-Z0-9]+)*\b|\bv\d+(?:\.\d+)*\b|#\d+\b', '<ID>'),
-        
-        # Territory/Jurisdiction
-        (r'\b(?:worldwide|global|international|national|regional|domestic)\b', '<TERRITORY>')
-    ]
-
-    # Apply single word patterns
-    for pattern, tag_type in single_word_patterns:
-        matches = re.finditer(pattern, enriched_text, re.IGNORECASE)
-        for match in reversed(list(matches)):
-            start, end = match.span()
-            # Check if this text is already tagged
-            if re.search(r'<[^>]+>[^<]*' + re.escape(enriched_text[start:end]), enriched_text):
-                continue
-            matched_text = enriched_text[start:end]
-            enriched_text = (
-                enriched_text[:start] + 
-                f"{tag_type}{matched_text}</{tag_type.strip('<>')}" +
-                enriched_text[end:]
-            )
-    
+                replacement = f"{tag_type}{matched_text}</{tag_type.strip('<>')}"
+            enriched_text = enriched_text[:start] + replacement + enriched_text[end:]
+
+    # Apply single word patterns in one scan of the combined alternation.
+    # Matches are walked back-to-front (as the in-place version did) so
+    # that once a word is tagged, earlier repeats of it are treated as
+    # already tagged and skipped.
+    replacements = []
+    tagged_words = set()
+    for match in reversed(list(_SINGLE_WORD_TAGS.finditer(enriched_text))):
+        start, end = match.span()
+        matched_text = enriched_text[start:end]
+        # Check if this text is already tagged
+        if matched_text in tagged_words or re.search(
+                r'<[^>]+>[^<]*' + re.escape(matched_text), enriched_text):
+            continue
+        tagged_words.add(matched_text)
+        tag = match.lastgroup
+        replacements.append((start, end, f"<{tag}>{matched_text}</{tag}"))
+    if replacements:
+        replacements.reverse()
+        enriched_text = _apply_tag_replacements(enriched_text, replacements)
+
     return enriched_text
\ No newline at end of file
@@ -1,4 +1,7 @@
+import atexit
 import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
 
 """
 Logging Configuration Module
@@ -9,30 +12,45 @@ Handles:
 - Managing log file output
 """
 
+_listener = None
+
 def setup_logging():
     """Configure application-wide logging settings
-    
+
     Sets up:
-    - File-based logging
+    - File-based logging via a background QueueListener, so emitting a
+      record never blocks the caller on a file write
     - Console output
     - Component-specific log levels
     - Log format and rotation
     """
-    logging.basicConfig(
-        filename='pdf_converter.log',
-        level=logging.WARNING,
-        format='%(asctime)s - %(levelname)s - %(message)s',
-        filemode='w'
+    global _listener
+    if _listener is not None:
+        return
+
+    # Records go through an unbounded queue to a single listener thread
+    # that owns the file descriptor; workers only pay an enqueue instead
+    # of contending on synchronous write()/flush() per record
+    file_handler = logging.FileHandler('pdf_converter.log', mode='w')
+    file_handler.setFormatter(
+        logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
     )
-    # Suppress INFO logs from http.client
     console = logging.StreamHandler()
     console.setLevel(logging.ERROR)
-    logging.getLogger('').addHandler(console)
-    
+
+    log_queue = queue.Queue(-1)
+    root = logging.getLogger('')
+    root.setLevel(logging.WARNING)
+    root.addHandler(QueueHandler(log_queue))
+
+    _listener = QueueListener(log_queue, file_handler, console,
+                              respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+
     logging.getLogger('http.client').setLevel(logging.ERROR)
     logging.getLogger('httpx').setLevel(logging.ERROR)
     logging.getLogger('unstructured').setLevel(logging.ERROR)
     logging.getLogger('unstructured_ingest.v2').setLevel(logging.ERROR)
     logging.getLogger('unstructured_ingest').setLevel(logging.ERROR)
     logging.getLogger('unstructured.trace').setLevel(logging.ERROR)
-    
\ No newline at end of file
@@ -8,11 +8,12 @@ Provides functionality for:
 """
 
 import fitz
-import matplotlib.patches as patches
-import matplotlib.pyplot as plt
-from PIL import Image
+import numpy as np
 import os
 import logging
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
 from rich.progress import (
     Progress, 
     SpinnerColumn, 
@@ -27,6 +28,18 @@ from .file_and_folder import get_json_file_elements
 
 console = Console()
 
+# Invariant across every page: build the palette once at import instead of
+# inside the per-page render path
+_CATEGORY_TO_COLOR = {
+    "Title": (0.855, 0.439, 0.839),      # orchid
+    "Image": (0.133, 0.545, 0.133),      # forestgreen
+    "Table": (1.0, 0.388, 0.278),        # tomato
+    "ListItem": (1.0, 0.843, 0.0),       # gold
+    "NarrativeText": (0.0, 0.749, 1.0),  # deepskyblue
+}
+_DEFAULT_COLOR = _CATEGORY_TO_COLOR["NarrativeText"]
+_LEGEND_ITEMS = tuple(_CATEGORY_TO_COLOR.items())
+
 def setup_logging():
     """Initialize logging for PDF annotation process"""
     logger = logging.getLogger(__name__)
@@ -37,67 +50,118 @@ def setup_logging():
         logger.handlers.clear()
     logger.addHandler(file_handler)
 
-def draw_bounding_boxes(pdf_page, documents, output_filename, output_dir):
-    """Generate annotated visualization of PDF page
-    
+def draw_bounding_boxes(input_file_path, page_number, documents, output_dir):
+    """Generate annotated visualization of a single PDF page
+
     Args:
-        pdf_page: PDF page object
+        input_file_path: Path to the source PDF
+        page_number: 1-based page number to annotate
         documents: List of document elements with coordinates
-        output_filename: Original PDF path
         output_dir: Output directory for annotated images
     """
-    base_filename = os.path.splitext(os.path.basename(output_filename))[0]
-    complete_image_path = os.path.join(
-        output_dir, 
-        f"{base_filename}-{pdf_page.number + 1}-annotated.jpg"
-    )
-    
-    if os.path.exists(complete_image_path):
-        logging.info(f"Skipping existing annotation for {base_filename} page {pdf_page.number + 1}")
-        return
-        
-    pix = pdf_page.get_pixmap()
-    pil_image = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
+    base_filename = os.path.splitext(os.path.basename(input_file_path))[0]
+    _annotate_page_batch(input_file_path, base_filename,
+                         [(page_number, documents)], output_dir)
 
-    fig, ax = plt.subplots(1, figsize=(20, 20))
-    ax.imshow(pil_image)
-    
-    category_to_color = {
-        "Title": "orchid",
-        "Image": "forestgreen",
-        "Table": "tomato",
-        "ListItem": "gold",
-        "NarrativeText": "deepskyblue",
-    }
-    
-    boxes_drawn = 0
+def _annotate_page_batch(pdf_source, base_filename, pages, output_dir):
+    """Annotate a batch of pages from one PDF (worker process)
+
+    The document is opened once per batch rather than once per page, so
+    fitz parses the xref table a single time for the whole range. Live
+    fitz objects can't cross process boundaries, so pdf_source is either
+    a filesystem path or a (shared-memory name, size) pair holding the
+    raw document bytes already read by the parent.
+
+    Args:
+        pdf_source: Path to the source PDF, or (shm_name, size) tuple
+        base_filename: Source filename without extension
+        pages: List of (1-based page number, documents) pairs
+        output_dir: Output directory for annotated images
+    """
+    # Join the stable prefix once; per-page paths are then one f-string
+    page_prefix = os.path.join(output_dir, base_filename)
+    os.makedirs(output_dir, exist_ok=True)
+    pdf = None
+    shm = None
+    try:
+        for page_number, documents in pages:
+            complete_image_path = f"{page_prefix}-{page_number}-annotated.jpg"
+            if os.path.exists(complete_image_path):
+                logging.info(f"Skipping existing annotation for {base_filename} page {page_number}")
+                continue
+            if pdf is None:
+                if isinstance(pdf_source, tuple):
+                    shm_name, size = pdf_source
+                    shm = shared_memory.SharedMemory(name=shm_name)
+                    pdf = fitz.open(stream=bytes(shm.buf[:size]), filetype="pdf")
+                else:
+                    pdf = fitz.open(pdf_source)
+            _render_page_annotation(pdf.load_page(page_number - 1), documents,
+                                    complete_image_path)
+    finally:
+        if pdf is not None:
+            pdf.close()
+        if shm is not None:
+            shm.close()
+
+def _render_page_annotation(pdf_page, documents, complete_image_path):
+    """Draw element bounding boxes onto the page and rasterize it once
+
+    Polygons and the legend are drawn directly with PyMuPDF in page
+    coordinates, so no matplotlib figure (and no huge RGBA canvas) is
+    ever allocated; the page is then rendered straight to the output
+    image. The in-memory page is mutated but never saved back to disk.
+    """
+    page_rect = pdf_page.rect
+
+    # One pass converts the per-element dicts into parallel arrays:
+    # polygon points, point counts, per-polygon scale factors and colors
+    polys, counts, scales, colors = [], [], [], []
     for doc in documents:
-        category = doc['type']
         c = doc['metadata']['coordinates']
-        points = c['points']
-        layout_width = c['layout_width']
-        layout_height = c['layout_height']
+        pts = np.asarray(c['points'], dtype=np.float32)
+        if pts.size == 0:
+            continue
+        polys.append(pts)
+        counts.append(len(pts))
+        scales.append((page_rect.width / c['layout_width'],
+                       page_rect.height / c['layout_height']))
+        colors.append(_CATEGORY_TO_COLOR.get(doc['type'], _DEFAULT_COLOR))
 
-        scaled_points = [
-            (x * pix.width / layout_width, y * pix.height / layout_height)
-            for x, y in points
-        ]
-        box_color = category_to_color.get(category, "deepskyblue")
-        polygon = patches.Polygon(
-            scaled_points, linewidth=2, edgecolor=box_color, facecolor="none"
-        )
-        ax.add_patch(polygon)
-        boxes_drawn += 1
-    
-    legend_handles = [patches.Patch(color=color, label=category) 
-                     for category, color in category_to_color.items()]
-    ax.axis("off")
-    ax.legend(handles=legend_handles, loc="upper right")
-    plt.tight_layout()
+    # Group polygons by color so each color is finished once:
+    # shape.finish closes a drawing context, and one finish per polygon
+    # is the dominant per-element overhead on dense pages
+    polygons_by_color = defaultdict(list)
+    if polys:
+        # Scale every point on the page with a single vectorized multiply,
+        # then split back into polygons by the recorded counts
+        all_pts = np.concatenate(polys)
+        all_pts *= np.repeat(np.asarray(scales, dtype=np.float32), counts, axis=0)
+        for pts, color in zip(np.split(all_pts, np.cumsum(counts)[:-1]), colors):
+            polygon = pts.tolist()
+            # Close the polygon explicitly; draw_polyline leaves it open
+            polygon.append(polygon[0])
+            polygons_by_color[color].append(polygon)
 
-    os.makedirs(output_dir, exist_ok=True)
-    fig.savefig(complete_image_path, format="jpg", dpi=300)
-    plt.close(fig)
+    shape = pdf_page.new_shape()
+    for color, polygons in polygons_by_color.items():
+        for polygon in polygons:
+            shape.draw_polyline(polygon)
+        shape.finish(color=color, width=2)
+
+    # Legend in the top-right corner
+    legend_y = 20
+    for category, color in _LEGEND_ITEMS:
+        shape.insert_text((page_rect.width - 120, legend_y), category,
+                          color=color, fontsize=10)
+        legend_y += 14
+    shape.commit()
+
+    # Native-resolution render: upscaling to 300 DPI added no detail to a
+    # layout-debugging image while multiplying the pixels to encode, and
+    # pix.save feeds libjpeg directly instead of round-tripping through PIL
+    pix = pdf_page.get_pixmap()
+    pix.save(complete_image_path, jpg_quality=85)
 
 def annotate_pdf_pages(file_name: str, num_pages: int, progress=None):
     """Process and annotate all pages in a PDF file
@@ -112,10 +176,19 @@ def annotate_pdf_pages(file_name: str, num_pages: int, progress=None):
     image_dir = os.path.join(output_dir, '03_annotated_pages')
     input_json_path = os.path.join(output_dir, '01_partitioned', file_name)
     input_file_path = os.path.join(input_dir, file_name)
-    
-    pdf = fitz.open(input_file_path)
+
+    # Some damaged or empty PDFs open with zero pages; there is nothing
+    # to annotate and the batch arithmetic below assumes at least one
+    if not num_pages:
+        return
+
     docs = get_json_file_elements(input_json_path)
-    
+
+    # Bucket elements by page once instead of rescanning docs per page
+    docs_by_page = defaultdict(list)
+    for doc in docs:
+        docs_by_page[doc['metadata'].get('page_number')].append(doc)
+
     with Progress(
         SpinnerColumn(),
         TextColumn("[progress.description]{task.description}"),
@@ -125,19 +198,53 @@ def annotate_pdf_pages(file_name: str, num_pages: int, progress=None):
         console=console
     ) as progress_bar:
         task = progress_bar.add_task(
-            f"[cyan]Annotating PDF: {file_name}", 
+            f"[cyan]Annotating PDF: {file_name}",
             total=num_pages
         )
-        
-        for page_number in range(1, num_pages + 1):
-            progress_bar.update(
-                task,
-                description=f"[cyan]Annotating page {page_number}/{num_pages}"
-            )
-            
-            page_docs = [doc for doc in docs if doc['metadata'].get('page_number') == page_number]
-            draw_bounding_boxes(pdf.load_page(page_number - 1), page_docs, input_file_path, image_dir)
-            
-            progress_bar.advance(task)
-            
-    pdf.close()
+
+        # Pages are independent and rasterization is compute-bound, so fan
+        # them out across worker processes. Contiguous ranges go to each
+        # worker so a document is opened once per batch, not once per page.
+        max_workers = min(os.cpu_count() or 1, num_pages) or 1
+        batch_size = -(-num_pages // max_workers)  # ceil division
+        batches = [
+            [(page_number, docs_by_page.get(page_number, []))
+             for page_number in range(start, min(start + batch_size, num_pages + 1))]
+            for start in range(1, num_pages + 1, batch_size)
+        ]
+        # Read the PDF once into shared memory: workers attach to the
+        # same kernel pages instead of each re-reading the file, and the
+        # document bytes are never pickled through the result pipe
+        base_filename = os.path.splitext(file_name)[0]
+        with open(input_file_path, 'rb') as f:
+            pdf_bytes = f.read()
+        shm = shared_memory.SharedMemory(create=True, size=len(pdf_bytes))
+        shm.buf[:len(pdf_bytes)] = pdf_bytes
+        pdf_source = (shm.name, len(pdf_bytes))
+        del pdf_bytes
+
+        try:
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                futures = {
+                    executor.submit(_annotate_page_batch, pdf_source,
+                                    base_filename, batch, image_dir): batch
+                    for batch in batches
+                }
+                completed = 0
+                for future in as_completed(futures):
+                    batch = futures[future]
+                    completed += len(batch)
+                    progress_bar.update(
+                        task,
+                        description=f"[cyan]Annotated {completed}/{num_pages} pages"
+                    )
+                    try:
+                        future.result()
+                    except Exception as e:
+                        pages_desc = f"pages {batch[0][0]}-{batch[-1][0]}"
+                        console.print(f"Error annotating {pages_desc}: {str(e)}", style="red")
+                        logging.error(f"Error annotating {pages_desc}: {str(e)}")
+                    progress_bar.advance(task, len(batch))
+        finally:
+            shm.close()
+            shm.unlink()
@@ -15,10 +15,17 @@ Key features:
 
 import logging
 import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from dataclasses import dataclass
 from typing import List, Optional
 import json
 import hashlib
+import fitz
+
+try:
+    import orjson
+except ImportError:
+    orjson = None  # Fall back to the stdlib json module
 from unstructured.partition.pdf import partition_pdf
 from unstructured.documents.elements import (
     Title, NarrativeText, ListItem, Table, Image
@@ -42,8 +49,11 @@ from unstructured_ingest.v2.processes.partitioner import PartitionerConfig
 from unstructured_ingest.v2.processes.chunker import ChunkerConfig
 from unstructured_ingest.v2.logger import logger as unstructured_logger
 
-# Load configuration at module level
-load_config()
+logger = logging.getLogger(__name__)
+
+# Configuration is loaded lazily by the first PDFProcessor so importing
+# this module doesn't pay config I/O (or require a config file at all)
+_CFG_LOADED = False
 
 @dataclass
 class PipelineConfigs:
@@ -72,7 +82,12 @@ class PDFProcessor:
     def __init__(self):
         self.console = Console()
         self.setup_logging()
-        
+
+        global _CFG_LOADED
+        if not _CFG_LOADED:
+            load_config()
+            _CFG_LOADED = True
+
         # Get the global config
         self.global_config = get_global_config()
         if not self.global_config:
@@ -179,19 +194,19 @@ class PDFProcessor:
         status = True
         self.console.print(f"Processing {len(pdf_files)} PDF files...", style="blue")
         
-        # Debug directory structure
-        print("\nDirectory Structure:")
-        print(f"Input directory: {input_dir}")
-        print(f"Partitioned directory: {self.partitioned_dir}")
-        print(f"Chunked directory: {self.chunked_dir}")
-        print(f"Work directory: {self.work_dir}")
-        
-        # Check directory contents before processing
-        print("\nInitial directory contents:")
-        print(f"Input dir contents: {os.listdir(input_dir)}")
-        print(f"Partitioned dir contents: {os.listdir(self.partitioned_dir)}")
-        print(f"Chunked dir contents: {os.listdir(self.chunked_dir)}")
-        
+        # Debug-only directory report: count entries via scandir instead of
+        # materializing (and printing) full name lists on every invocation
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Input directory: %s", input_dir)
+            logger.debug("Partitioned directory: %s", self.partitioned_dir)
+            logger.debug("Chunked directory: %s", self.chunked_dir)
+            logger.debug("Work directory: %s", self.work_dir)
+            for label, directory in (("input", input_dir),
+                                     ("partitioned", self.partitioned_dir),
+                                     ("chunked", self.chunked_dir)):
+                logger.debug("%s dir entry count: %d", label,
+                             sum(1 for _ in os.scandir(directory)))
+
         # 1. Run partitioning pipeline
         self.console.print("Starting partitioning...", style="blue")
         configs = self.create_pipeline_configs(input_dir, self.partitioned_dir)
@@ -210,41 +225,60 @@ class PDFProcessor:
                 self.console.print(f"Error during enrichment: {str(e)}", style="red")
                 status = False
         
-        # 3. Chunk partitions
-        if status:
-            self.console.print("\nStarting chunking...", style="blue")
-            chunking_configs = self.create_pipeline_configs(
-                self.partitioned_dir, 
-                self.chunked_dir, 
-                is_chunking=True
+        # 3+4. Chunking and annotation both consume only the partitioned
+        # output: chunking waits on the Unstructured API while annotation
+        # burns local CPU, so run them as overlapping pipeline stages
+        # instead of back-to-back global barriers
+        with ThreadPoolExecutor(max_workers=1) as annotation_executor:
+            annotation_future = annotation_executor.submit(
+                self._annotate_pdfs, input_dir, pdf_files
             )
-            try:
-                print("\nChunking configuration:")
-                print(f"Input path: {chunking_configs.indexer_config.input_path}")
-                print(f"Output dir: {chunking_configs.uploader_config.output_dir}")
-                print(f"Chunking strategy: {chunking_configs.chunker_config.chunking_strategy}")
-                
-                self._run_pipeline(chunking_configs)
-                
-                # Check directory contents after chunking
-                print("\nPost-chunking directory contents:")
-                print(f"Chunked dir contents: {os.listdir(self.chunked_dir)}")
-                
-            except Exception as e:
-                self.console.print(f"Error during chunking: {str(e)}", style="red")
-                print(f"Full chunking error: {str(e)}")
+
+            if status:
+                self.console.print("\nStarting chunking...", style="blue")
+                chunking_configs = self.create_pipeline_configs(
+                    self.partitioned_dir,
+                    self.chunked_dir,
+                    is_chunking=True
+                )
+                try:
+                    print("\nChunking configuration:")
+                    print(f"Input path: {chunking_configs.indexer_config.input_path}")
+                    print(f"Output dir: {chunking_configs.uploader_config.output_dir}")
+                    print(f"Chunking strategy: {chunking_configs.chunker_config.chunking_strategy}")
+
+                    self._run_pipeline(chunking_configs)
+
+                    if logger.isEnabledFor(logging.DEBUG):
+                        logger.debug("chunked dir entry count after chunking: %d",
+                                     sum(1 for _ in os.scandir(self.chunked_dir)))
+
+                except Exception as e:
+                    self.console.print(f"Error during chunking: {str(e)}", style="red")
+                    print(f"Full chunking error: {str(e)}")
+                    status = False
+
+            self.cleanup_file_extensions()
+
+            if logger.isEnabledFor(logging.DEBUG):
+                if os.path.exists(self.chunked_dir):
+                    logger.debug("chunked dir entry count after cleanup: %d",
+                                 sum(1 for _ in os.scandir(self.chunked_dir)))
+                else:
+                    logger.debug("Chunked directory does not exist")
+
+            if not annotation_future.result():
                 status = False
 
-        self.cleanup_file_extensions()
-        
-        # After chunking
-        print(f"Checking chunked directory contents:")
-        if os.path.exists(self.chunked_dir):
-            print(os.listdir(self.chunked_dir))
-        else:
-            print("Chunked directory does not exist!")
-        
-        # 4. Annotate PDF pages using coordinates found in partitioned JSON files
+        return status
+
+    def _annotate_pdfs(self, input_dir: str, pdf_files: List[str]) -> bool:
+        """Annotate pages for each PDF from its partitioned JSON coordinates
+
+        Returns:
+            bool: True if every file annotated successfully
+        """
+        status = True
         for pdf_file in pdf_files:
             basename = os.path.basename(pdf_file)
             pdf_path = os.path.join(input_dir, basename)
@@ -259,7 +293,6 @@ class PDFProcessor:
                 self.console.print(f"Error processing {pdf_file}: {str(e)}", style="red")
                 logging.error(f"Error processing {pdf_file}: {str(e)}")
                 status = False
-        
         return status
 
     def enrich_partitions(self):
@@ -267,29 +300,45 @@ class PDFProcessor:
         self.console.print("Enhancing image and table metadata...", style="blue")
         # Only process partitioned files
         json_files = get_files_with_extension(self.partitioned_dir, '.json')
-        
-        for json_file in json_files:
-            try:
-                enrich_json_with_summaries(json_file)
-                self.console.print(f"Successfully enriched {json_file}", style="green")
-            except Exception as e:
-                self.console.print(f"Error processing {json_file}: {str(e)}", style="red")
-                logging.error(f"Error processing {json_file}: {str(e)}")
+
+        # Enrichment is bound on API latency, so overlap the files; the
+        # worker count is tunable so deployments can match their OpenAI
+        # rate limit (each file also fans out element-level requests)
+        max_workers = int(getattr(self.global_config.pdf_processing,
+                                  'max_enrichment_workers', 8)) or 8
+        # Per-file live displays fight over the terminal when several
+        # files run at once, so only a lone file keeps its progress bar
+        show_progress = len(json_files) == 1
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(enrich_json_with_summaries, json_file,
+                                show_progress=show_progress): json_file
+                for json_file in json_files
+            }
+            for future in as_completed(futures):
+                json_file = futures[future]
+                try:
+                    future.result()
+                    self.console.print(f"Successfully enriched {json_file}", style="green")
+                except Exception as e:
+                    self.console.print(f"Error processing {json_file}: {str(e)}", style="red")
+                    logging.error(f"Error processing {json_file}: {str(e)}")
 
     def cleanup_file_extensions(self):
         """Clean up duplicate .json extensions"""
-        chunked_files = [
-            f for f in os.listdir(self.chunked_dir) 
-            if f.endswith('.json.json')
-        ]
-        
-        for file in chunked_files:
-            old_path = os.path.join(self.chunked_dir, file)
-            new_path = os.path.join(self.chunked_dir, file.replace('.json.json', '.json'))
-            os.rename(old_path, new_path)
-            
+        renamed = 0
+        with os.scandir(self.chunked_dir) as entries:
+            for entry in entries:
+                if entry.name.endswith('.json.json') and entry.is_file():
+                    new_path = os.path.join(
+                        self.chunked_dir,
+                        entry.name.replace('.json.json', '.json')
+                    )
+                    os.rename(entry.path, new_path)
+                    renamed += 1
+
         self.console.print(
-            f"Renamed {len(chunked_files)} files to remove duplicate .json extension", 
+            f"Renamed {renamed} files to remove duplicate .json extension",
             style="green"
         )
 
@@ -376,13 +425,40 @@ class PDFProcessor:
         except Exception as e:
             return 0, f"Unexpected error during processing: {str(e)}"
 
-def process_pdf(pdf_path: str) -> Optional[str]:
+def _partition_page_range(sub_pdf_path: str, first_page: int) -> list:
+    """Partition one page-range temp PDF (worker process)
+
+    Args:
+        sub_pdf_path (str): Path to the extracted page-range PDF
+        first_page (int): 1-based page number of the range's first page
+            in the original document
+
+    Returns:
+        list: Partitioned elements with page_number metadata rewritten
+            back to original-document numbering
+    """
+    elements = partition_pdf(
+        sub_pdf_path,
+        strategy="hi_res",
+        extract_images_in_pdf=True,
+        infer_table_structure=True,
+        include_page_breaks=True
+    )
+    for element in elements:
+        page_number = getattr(element.metadata, 'page_number', None)
+        if page_number is not None:
+            element.metadata.page_number = first_page + page_number - 1
+    return elements
+
+def process_pdf(pdf_path: str, strict_cache: bool = False) -> Optional[str]:
     """
     Process a PDF file and return path to JSON output.
-    
+
     Args:
         pdf_path (str): Path to the PDF file
-        
+        strict_cache (bool): Key the output cache on file contents
+            (requires reading the whole file) instead of size + mtime
+
     Returns:
         Optional[str]: Path to the output JSON file, or None if processing fails
     """
@@ -390,25 +466,70 @@ def process_pdf(pdf_path: str) -> Optional[str]:
         # Create output directories if they don't exist
         output_dir = os.path.join("data", "output", "temp", "index")
         os.makedirs(output_dir, exist_ok=True)
-        
-        # Generate a unique filename based on PDF content
-        with open(pdf_path, 'rb') as f:
-            file_hash = hashlib.md5(f.read()).hexdigest()[:12]
+
+        if strict_cache:
+            # Content-based key: hash in blocks so large files never sit
+            # fully in memory
+            hasher = hashlib.md5()
+            with open(pdf_path, 'rb') as f:
+                while block := f.read(1024 * 1024):
+                    hasher.update(block)
+            file_hash = hasher.hexdigest()[:12]
+        else:
+            # One stat call identifies an unchanged file on disk, so cache
+            # hits skip reading the PDF entirely
+            st = os.stat(pdf_path)
+            file_hash = f"{st.st_size}-{st.st_mtime_ns}"
         output_file = os.path.join(output_dir, f"{file_hash}.json")
         
         # If already processed, return existing file
         if os.path.exists(output_file):
             return output_file
             
-        # Process PDF
-        elements = partition_pdf(
-            pdf_path,
-            strategy="hi_res",
-            extract_images_in_pdf=True,
-            infer_table_structure=True,
-            include_page_breaks=True
-        )
-        
+        # Split the PDF into contiguous page ranges and partition them in
+        # parallel: the hi_res layout model is compute-bound, so running
+        # serially leaves every core but one idle on long documents
+        split_dir = os.path.join(output_dir, f"{file_hash}-split")
+        os.makedirs(split_dir, exist_ok=True)
+        with fitz.open(pdf_path) as source_pdf:
+            num_pages = source_pdf.page_count
+            max_workers = min(os.cpu_count() or 1, num_pages) or 1
+            # max(1, ...) keeps the range step legal for zero-page PDFs,
+            # which fitz opens for some damaged or empty files
+            batch_size = max(1, -(-num_pages // max_workers))  # ceil division
+            ranges = []
+            for start in range(0, num_pages, batch_size):
+                end = min(start + batch_size, num_pages) - 1
+                sub_pdf_path = os.path.join(split_dir, f"pages-{start + 1}-{end + 1}.pdf")
+                sub_pdf = fitz.open()
+                sub_pdf.insert_pdf(source_pdf, from_page=start, to_page=end)
+                sub_pdf.save(sub_pdf_path)
+                sub_pdf.close()
+                ranges.append((sub_pdf_path, start + 1))
+
+        elements = []
+        try:
+            if len(ranges) == 1:
+                elements = _partition_page_range(*ranges[0])
+            elif ranges:
+                # Results come back in submission order, so element order
+                # matches the original page order
+                with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                    sub_paths, first_pages = zip(*ranges)
+                    for batch in executor.map(_partition_page_range, sub_paths, first_pages):
+                        elements.extend(batch)
+        finally:
+            for sub_pdf_path, _ in ranges:
+                try:
+                    os.remove(sub_pdf_path)
+                except OSError:
+                    pass
+            try:
+                os.rmdir(split_dir)
+            except OSError:
+                pass
+
+
         # Convert elements to JSON-serializable format
         processed_elements = []
         for element in elements:
@@ -429,10 +550,16 @@ def process_pdf(pdf_path: str) -> Optional[str]:
                 
             processed_elements.append(element_dict)
             
-        # Save to JSON
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(processed_elements, f, indent=2, ensure_ascii=False)
-            
+        # Save to JSON. The output is machine-consumed by the chunker, so
+        # skip pretty-printing and let orjson serialize when available
+        if orjson is not None:
+            with open(output_file, 'wb') as f:
+                f.write(orjson.dumps(processed_elements))
+        else:
+            with open(output_file, 'w', encoding='utf-8') as f:
+                json.dump(processed_elements, f, ensure_ascii=False)
+
+
         return output_file
         
     except Exception as e:
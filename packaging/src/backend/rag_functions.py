@@ -9,21 +9,18 @@ Provides FastAPI endpoints for:
 
 import openai
 import numpy as np
-import configparser
 from supabase import create_client, Client
 from fastapi import FastAPI, UploadFile, File, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from pathlib import Path
-import shutil
 import httpx
 from helpers.pdf_ingest import PDFProcessor
-from helpers.pdf_annotation import annotate_pdf_pages
-from helpers.enrichments import enrich_json_with_summaries
 from helpers.config import load_config, get_global_config
+import asyncio
+import hashlib
 import logging
-from store_chunks import insert_chunks, process_embeddings, get_or_create_document_id
+from store_chunks import insert_chunks
 import os
-import json
 
 # Initialize FastAPI app
 app = FastAPI()
@@ -37,6 +34,8 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+logger = logging.getLogger(__name__)
+
 # Load configuration at startup
 load_config()
 global_config = get_global_config()
@@ -48,11 +47,28 @@ if not global_config:
 unstructured_api_key = global_config.api_keys.unstructured_api_key
 unstructured_url = global_config.api_keys.unstructured_url
 
-# Initialize OpenAI client
+# Pooled HTTP transports shared across all OpenAI calls: keep-alive
+# connections amortize TCP+TLS setup over the lifetime of the process
+_HTTP_LIMITS = httpx.Limits(max_keepalive_connections=50, max_connections=100)
+http_client = httpx.Client(timeout=30, limits=_HTTP_LIMITS)
+async_http_client = httpx.AsyncClient(timeout=30, limits=_HTTP_LIMITS)
+
+# Initialize OpenAI clients (sync for helpers, async for request handlers)
 client = openai.OpenAI(
-    api_key=global_config.api_keys.openai_api_key
+    api_key=global_config.api_keys.openai_api_key,
+    http_client=http_client
+)
+aclient = openai.AsyncOpenAI(
+    api_key=global_config.api_keys.openai_api_key,
+    http_client=async_http_client
 )
 
+@app.on_event("shutdown")
+async def close_http_clients():
+    """Drain the pooled HTTP transports on shutdown"""
+    await async_http_client.aclose()
+    http_client.close()
+
 # Initialize Supabase client
 supabase: Client = create_client(
     supabase_url=global_config.supabase.supabase_url,
@@ -63,6 +79,9 @@ supabase: Client = create_client(
 UPLOAD_DIR = Path("data/input")
 UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 
+# Chunked-output directory never changes at runtime; resolve it once
+CHUNKED_DIR = Path(global_config.directories.output_dir) / '02_chunked'
+
 def query_similar_chunks(embedding, document_id):
     """Find similar chunks using vector similarity search
     
@@ -74,20 +93,26 @@ def query_similar_chunks(embedding, document_id):
         list: Similar chunks with similarity scores
     """
     try:
+        # Embeddings arrive as plain lists; accept ndarray callers too
+        if hasattr(embedding, 'tolist'):
+            embedding = embedding.tolist()
         response = supabase.rpc(
             'match_documents2', {
-            'query_embedding': embedding.tolist(),
+            'query_embedding': embedding,
             'match_threshold': -0.2,
             'match_count': 5,
             'filter_document_id': document_id
         }).execute()
 
         if response.data:
-            print(f"Found {len(response.data)} matching chunks for document_id {document_id}")
-            for chunk in response.data:
-                print(f"Similarity score: {chunk['similarity']}")
-                print(f"First 100 chars of chunk: {chunk['text'][:100]}...")
-                
+            # Per-chunk reporting only formats when DEBUG is enabled
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Found %d matching chunks for document_id %s",
+                             len(response.data), document_id)
+                for chunk in response.data:
+                    logger.debug("Similarity %s: %.100s...",
+                                 chunk['similarity'], chunk['text'])
+
             return [
                 {
                     'id': chunk['id'],
@@ -97,129 +122,628 @@ def query_similar_chunks(embedding, document_id):
                 } for chunk in response.data
             ]
         else:
-            # Debug query to check chunks for this document
-            check_chunks = supabase.table("chunks").select("id, text").eq("document_id", document_id).limit(5).execute()
-            print(f"Sample of available chunks for document_id {document_id}:")
-            for chunk in check_chunks.data:
-                print(f"Chunk {chunk['id']}: {chunk['text'][:100]}...")
+            # The sample query exists purely for debugging, so only pay
+            # the extra round trip when someone is looking
+            if logger.isEnabledFor(logging.DEBUG):
+                check_chunks = supabase.table("chunks").select("id, text").eq("document_id", document_id).limit(5).execute()
+                logger.debug("Sample of available chunks for document_id %s:", document_id)
+                for chunk in check_chunks.data:
+                    logger.debug("Chunk %s: %.100s...", chunk['id'], chunk['text'])
             return []
-            
+
     except Exception as e:
-        print(f"Error querying Supabase: {e}")
+        logging.error(f"Error querying Supabase: {e}")
         return []
 
+def query_similar_chunks_batch(embeddings, document_id):
+    """Find similar chunks for several query embeddings in one RPC
+
+    Sends all embeddings to the match_documents_batch Postgres function
+    (see db/schema/match_documents_batch.sql), which LATERAL-joins each
+    one against the chunks table server-side — one HTTP round trip
+    instead of one per variable.
+
+    Args:
+        embeddings: List of query vector embeddings
+        document_id: Document to search within
+
+    Returns:
+        list: One chunk list per embedding (same shape as
+            query_similar_chunks), or None if the batched RPC fails
+    """
+    payload = [e.tolist() if hasattr(e, 'tolist') else e for e in embeddings]
+    try:
+        response = supabase.rpc(
+            'match_documents_batch', {
+            'query_embeddings': payload,
+            'match_threshold': -0.2,
+            'match_count': 5,
+            'filter_document_id': document_id
+        }).execute()
+    except Exception as e:
+        print(f"Batched similarity RPC failed: {e}")
+        return None
+
+    # Group the flat (query_idx, chunk) rows back per embedding
+    grouped = [[] for _ in embeddings]
+    for chunk in response.data or []:
+        grouped[chunk['query_idx']].append({
+            'id': chunk['id'],
+            'text': chunk['text'],
+            'similarity': chunk['similarity'],
+            'metadata': {'page_number': chunk['start_page_number']}
+        })
+    return grouped
+
+# Embedding model settings, shared by query and ingest sides: 3-small
+# truncated to 512 dims keeps recall close to ada-002 while shrinking
+# vectors 3x (faster <=> comparisons, smaller indexes and payloads)
+EMBEDDING_MODEL = "text-embedding-3-small"
+EMBEDDING_DIMENSIONS = 512
+
+# The retrieval questions are static across uploads, so their embeddings
+# are memoized in-process as compact float32 bytes; a dict (rather than
+# lru_cache) lets the batched path share and prime the same cache
+_embedding_cache = {}
+_EMBEDDING_CACHE_MAX = 4096
+
+def _cache_embedding(prompt, vector):
+    """Store one embedding, evicting the oldest entry when full"""
+    if len(_embedding_cache) >= _EMBEDDING_CACHE_MAX:
+        _embedding_cache.pop(next(iter(_embedding_cache)))
+    _embedding_cache[prompt] = np.asarray(vector, dtype=np.float32).tobytes()
+
 def get_openai_embedding(prompt: str):
-    """Get vector embedding from OpenAI for the given prompt"""
+    """Get vector embedding from OpenAI for the given prompt
+
+    Repeated prompts are served from the in-process cache without an
+    API call. Returns the embedding as a plain list of floats — the
+    only consumer forwards it to a JSON-RPC call, so wrapping it in an
+    ndarray just to convert back was wasted work.
+    """
+    cached = _embedding_cache.get(prompt)
+    if cached is not None:
+        return np.frombuffer(cached, dtype=np.float32).tolist()
     try:
         response = client.embeddings.create(
-            model="text-embedding-ada-002",
-            input=prompt
+            model=EMBEDDING_MODEL,
+            input=prompt,
+            dimensions=EMBEDDING_DIMENSIONS
         )
-        return np.array(response.data[0].embedding)
+        vector = response.data[0].embedding
+        _cache_embedding(prompt, vector)
+        return vector
     except Exception as e:
         print(f"Error getting embedding: {e}")
         return None
 
-def process_variables(variables, document_id, file_path: str = None):
+def get_openai_embeddings(prompts):
+    """Get vector embeddings for several prompts in one API call
+
+    Cached prompts are filled locally and only the misses are sent to
+    the API, so repeat uploads with the static variable list embed for
+    free.
+
+    Args:
+        prompts: List of prompt strings to embed
+
+    Returns:
+        list: One list-of-floats embedding per prompt, in input order,
+            or None on error
+    """
+    prompts = list(prompts)
+    vectors = [None] * len(prompts)
+    misses = []
+    for idx, prompt in enumerate(prompts):
+        cached = _embedding_cache.get(prompt)
+        if cached is not None:
+            vectors[idx] = np.frombuffer(cached, dtype=np.float32).tolist()
+        else:
+            misses.append(idx)
+
+    if not misses:
+        return vectors
+
+    try:
+        response = client.embeddings.create(
+            model=EMBEDDING_MODEL,
+            input=[prompts[idx] for idx in misses],
+            dimensions=EMBEDDING_DIMENSIONS
+        )
+        for idx, item in zip(misses, response.data):
+            vector = item.embedding
+            _cache_embedding(prompts[idx], vector)
+            vectors[idx] = vector
+        return vectors
+    except Exception as e:
+        print(f"Error getting embeddings: {e}")
+        return None
+
+def _variable_prompt_sha(var):
+    """Hash a variable's prompts to detect when its definition changes"""
+    return hashlib.sha256(
+        (var['retrieve_question'] + var['generate_question']).encode()
+    ).hexdigest()
+
+def _load_cached_answers(document_id, shas):
+    """Fetch cached answers for all variables in one query
+
+    Returns:
+        dict: (var_name, prompt_sha) -> answer
+    """
+    try:
+        response = supabase.table('variable_cache') \
+            .select('var_name, prompt_sha, answer') \
+            .eq('document_id', document_id) \
+            .in_('prompt_sha', shas) \
+            .execute()
+        return {(row['var_name'], row['prompt_sha']): row['answer']
+                for row in (response.data or [])}
+    except Exception as e:
+        logging.error(f"Error reading variable cache: {e}")
+        return {}
+
+def _store_cached_answers(rows):
+    """Upsert freshly generated answers into the variable cache"""
+    try:
+        supabase.table('variable_cache').upsert(rows).execute()
+    except Exception as e:
+        logging.error(f"Error writing variable cache: {e}")
+
+def _build_context(chunks, max_chunks=5):
+    """Rank and deduplicate retrieved chunks into a context string
+
+    Re-ingested documents can leave duplicate chunk rows, so identical
+    ids or texts would burn prompt tokens twice. Sort by similarity
+    with one NumPy pass, then keep the top unique texts.
+
+    Args:
+        chunks: Chunk dicts with 'id', 'text' and 'similarity'
+        max_chunks: Maximum number of texts to include
+
+    Returns:
+        str: Newline-joined context
+    """
+    if len(chunks) > 1:
+        similarities = np.fromiter((chunk['similarity'] for chunk in chunks),
+                                   dtype=np.float32, count=len(chunks))
+        chunks = [chunks[i] for i in np.argsort(-similarities)]
+
+    seen_ids = set()
+    seen_texts = set()
+    texts = []
+    for chunk in chunks:
+        if chunk['id'] in seen_ids or chunk['text'] in seen_texts:
+            continue
+        seen_ids.add(chunk['id'])
+        seen_texts.add(chunk['text'])
+        texts.append(chunk['text'])
+        if len(texts) == max_chunks:
+            break
+    return "\n".join(texts)
+
+# Static extraction rules shared by every chat call. Keeping this
+# message byte-identical and first in the conversation maximizes the
+# API's prompt-prefix KV-cache reuse across the concurrent calls
+_EXTRACTOR_SYSTEM_MESSAGE = {
+    "role": "system",
+    "content": """You are a precise data extractor. Extract EXACTLY what is asked for:
+    - For currency, if you see € or 'euro', return 'EUR'
+    - For payments, include the FULL amount with currency symbols and rates (e.g., €3.000,00/H)
+    - If multiple values exist, return ALL relevant values
+    - Do not make assumptions or add explanatory text
+    - If the specific value is not found, return ONLY 'Not found'"""
+}
+
+# Per-variable user message, hoisted so each call only pays one format
+# over the shared template instead of rebuilding the scaffolding
+_PROMPT_TEMPLATE = """Answer based only on the provided context.
+
+Question: {question}
+
+Context:
+{context}
+
+Answer:"""
+
+async def _extract_variable(var, embedding, document_id, chunks=None):
+    """Retrieve context and generate the answer for one variable
+
+    Args:
+        chunks: Pre-fetched similar chunks from the batched RPC; when
+            None, retrieval falls back to a per-variable query
+
+    Returns:
+        tuple: (variable name, answer string or None)
+    """
+    print(f"\nProcessing variable: {var['name']} for document_id: {document_id}")
+
+    if embedding is None:
+        print(f"Failed to get embedding for {var['name']}")
+        return var['name'], None
+
+    if chunks is None:
+        # Supabase's client is synchronous, so run retrieval on a thread
+        # to keep the event loop free
+        chunks = await asyncio.to_thread(query_similar_chunks, embedding, document_id)
+    if not chunks:
+        print(f"No relevant chunks found for {var['name']} in document_id {document_id}")
+        return var['name'], None
+
+    # Prepare context from chunks, best match first and duplicates dropped
+    context = _build_context(chunks)
+
+    # Prepare prompt for generation: the variable question and context
+    # go last so the static scaffolding stays a shared cacheable prefix
+    prompt = _PROMPT_TEMPLATE.format(
+        question=var['generate_question'], context=context
+    )
+
+    try:
+        # Generate answer using OpenAI, streaming the deltas so tokens
+        # accumulate while the other variables' calls are in flight
+        stream = await aclient.chat.completions.create(
+            model="gpt-4-turbo-preview",
+            messages=[
+                _EXTRACTOR_SYSTEM_MESSAGE,
+                {"role": "user", "content": prompt}
+            ],
+            stream=True
+        )
+
+        parts = []
+        async for piece in stream:
+            if piece.choices and piece.choices[0].delta.content:
+                parts.append(piece.choices[0].delta.content)
+        answer = "".join(parts).strip()
+        print(f'"{var["name"]}", "{answer}"')
+        return var['name'], answer
+
+    except Exception as e:
+        print(f"Error generating answer for {var['name']}: {e}")
+        return var['name'], None
+
+async def process_variables(variables, document_id, file_path: str = None):
     """Extract requested variables from document content
-    
+
+    Each variable's retrieval and generation round trips run
+    concurrently via asyncio.gather, so wall time is bounded by the
+    slowest variable instead of the sum of all of them.
+
     Args:
         variables: List of variables to extract
         document_id: Document to process
         file_path: Optional path to document file
-        
+
     Returns:
         dict: Extracted variables and values
     """
+    # Answers for an unchanged (document, prompt) pair are served from
+    # the persistent cache, so re-processing a document skips its LLM
+    # and retrieval work entirely
+    variables = list(variables)
+    shas = [_variable_prompt_sha(var) for var in variables]
+    cached = await asyncio.to_thread(_load_cached_answers, document_id, shas)
+
     results = {}
-    
-    for var in variables:
-        print(f"\nProcessing variable: {var['name']} for document_id: {document_id}")
-        
-        # Get embedding for retrieval question
-        embedding = get_openai_embedding(var['retrieve_question'])
-        if embedding is None:
-            print(f"Failed to get embedding for {var['name']}")
-            continue
-            
-        # Get similar chunks
-        chunks = query_similar_chunks(embedding, document_id)
-        if not chunks:
-            print(f"No relevant chunks found for {var['name']} in document_id {document_id}")
+    pending = []
+    for var, sha in zip(variables, shas):
+        answer = cached.get((var['name'], sha))
+        if answer is not None:
+            print(f"Cached answer for {var['name']}")
+            results[var['name']] = answer
+        else:
+            pending.append((var, sha))
+
+    if not pending:
+        return results
+    variables = [var for var, _ in pending]
+
+    # Embed every retrieval question in one batched API call instead of
+    # one round trip per variable; fall back to per-variable requests if
+    # the batch fails
+    embeddings = await asyncio.to_thread(
+        get_openai_embeddings, [var['retrieve_question'] for var in variables]
+    )
+    if embeddings is None:
+        embeddings = [
+            await asyncio.to_thread(get_openai_embedding, var['retrieve_question'])
+            for var in variables
+        ]
+
+    # Retrieve context for every variable in one batched RPC; on failure
+    # each variable falls back to its own similarity query
+    chunk_lists = None
+    if all(embedding is not None for embedding in embeddings):
+        chunk_lists = await asyncio.to_thread(
+            query_similar_chunks_batch, embeddings, document_id
+        )
+    if chunk_lists is None:
+        chunk_lists = [None] * len(embeddings)
+
+    outcomes = await asyncio.gather(
+        *[_extract_variable(var, embedding, document_id, chunks)
+          for var, embedding, chunks in zip(variables, embeddings, chunk_lists)],
+        return_exceptions=True
+    )
+
+    new_rows = []
+    sha_by_name = {var['name']: sha for var, sha in pending}
+    for outcome in outcomes:
+        if isinstance(outcome, BaseException):
+            print(f"Error processing variable: {outcome}")
             continue
-            
-        # Prepare context from chunks
-        context = "\n".join([chunk['text'] for chunk in chunks])
-        
-        # Prepare prompt for generation
-        prompt = f"""Based on the following context, {var['generate_question']}
+        name, answer = outcome
+        if answer is not None:
+            results[name] = answer
+            new_rows.append({
+                'document_id': document_id,
+                'var_name': name,
+                'prompt_sha': sha_by_name[name],
+                'answer': answer
+            })
 
-Context:
-{context}
+    if new_rows:
+        await asyncio.to_thread(_store_cached_answers, new_rows)
 
-Answer:"""
-        
+    # Persist every extracted value in a single upsert instead of one
+    # write round trip per variable
+    if results:
+        rows = [{'document_id': document_id, 'name': name, 'value': value}
+                for name, value in results.items()]
         try:
-            # Generate answer using OpenAI
-            response = client.chat.completions.create(
-                model="gpt-4-turbo-preview",
-                messages=[
-                    {
-                        "role": "system", 
-                        "content": """You are a precise data extractor. Extract EXACTLY what is asked for:
-                        - For currency, if you see € or 'euro', return 'EUR'
-                        - For payments, include the FULL amount with currency symbols and rates (e.g., €3.000,00/H)
-                        - If multiple values exist, return ALL relevant values
-                        - Do not make assumptions or add explanatory text
-                        - If the specific value is not found, return ONLY 'Not found'"""
-                    },
-                    {"role": "user", "content": prompt}
-                ]
+            await asyncio.to_thread(
+                lambda: supabase.table('doc_variables')
+                .upsert(rows, on_conflict='document_id,name')
+                .execute()
             )
-            
-            answer = response.choices[0].message.content.strip()
-            results[var['name']] = answer
-            
-            print(f'"{var["name"]}", "{answer}"')
-            
         except Exception as e:
-            print(f"Error generating answer for {var['name']}: {e}")
-            continue
-    
+            logging.error(f"Error storing extracted variables: {e}")
+
     return results
 
-def check_document_processed(file_path: str) -> tuple[bool, str]:
+async def check_document_processed(file_path: str) -> tuple[bool, str]:
     """
-    Check if document has already been processed by looking for chunks in database 
+    Check if document has already been processed by looking for chunks in database
     and existing JSON files
     Returns: (is_processed, json_file_path)
     """
     try:
         file_name = Path(file_path).name
         print(f"Checking if {file_name} has been processed...")
-        
-        # Check database
-        response = supabase.table('chunks') \
-            .select('id') \
-            .eq('source_file', file_name) \
-            .execute()
-            
-        chunks_exist = len(response.data) > 0
-        
-        # Check for existing JSON file
-        chunked_dir = os.path.join(global_config.directories.output_dir, '02_chunked')
-        json_file = os.path.join(chunked_dir, f"{file_name}.json")
-        json_exists = os.path.exists(json_file)
-        
+
+        json_file = CHUNKED_DIR / f"{file_name}.json"
+
+        def _count_chunks():
+            # count='exact' with limit(1) asks Postgres for the count
+            # instead of shipping every chunk id over the wire
+            return supabase.table('chunks') \
+                .select('id', count='exact') \
+                .eq('source_file', file_name) \
+                .limit(1) \
+                .execute()
+
+        # The database and filesystem checks are independent blocking
+        # calls, so run them concurrently off the event loop
+        response, json_exists = await asyncio.gather(
+            asyncio.to_thread(_count_chunks),
+            asyncio.to_thread(json_file.exists)
+        )
+        chunks_exist = (response.count or 0) > 0
+
         print(f"Found existing chunks in DB: {chunks_exist}")
         print(f"Found existing JSON file: {json_exists}")
-        
-        return chunks_exist, json_file
-        
+
+        return chunks_exist, str(json_file)
+
     except Exception as e:
         logging.error(f"Error checking document status: {e}")
         return False, ""
 
+# The variable definitions are static: building this list inside the
+# upload handler re-allocated every dict and prompt string per request,
+# so it lives here and is constructed once at import
+EXTRACTION_VARIABLES = [
+    {
+        "name": "deal_name",
+        "retrieve_question": "Find text containing <PRODUCT> tags that describe the agreement type, or <LEGAL> tags that contain the word 'Agreement'. Focus on the first few paragraphs of the document.",
+        "generate_question": "Extract ONLY the core agreement type (e.g. 'License Agreement', 'Service Agreement'). If you see <PRODUCT>License Agreement</PRODUCT> or <LEGAL>License Agreement</LEGAL>, return just 'License Agreement' without any party names or dates."
+    },
+    {
+        "name": "license_period",
+        "retrieve_question": """Find text containing:
+        1. Tables or definitions that mention 'Pay License Period' or 'License Period'
+        2. Look for <examples> tags containing date ranges
+        3. Look for <DATE> tags containing date ranges
+        4. Look for text that shows examples of license periods in DD/MM/YYYY-DD/MM/YYYY format
+        5. Focus on text that defines or shows examples of license periods
+        
+        Example text to match:
+        - <examples>"01/07/2020-05/01/2023"</examples>
+        - <definition>Pay License Period</definition>
+        - <DATE>01/07/2020-05/01/2023</DATE>
+        - Tables showing license period dates""",
+        
+        "generate_question": """Extract ONLY the exact license period date range. 
+
+        Rules:
+        1. If you find a date range in <examples> tags within a Pay License Period definition, use that exact value
+        2. If you find a date range in <DATE> tags, use that exact value
+        3. Return the date range in exactly the format shown (e.g., '01/07/2020-05/01/2023')
+        4. Do not modify or reformat the dates
+        5. Do not include any explanatory text
+        6. If multiple periods exist, prioritize the Pay License Period
+        7. Look for date ranges in both <examples> and <DATE> tags
+        8. If no specific date range is found, return 'Not found'
+
+        Example matches:
+        Input: '<examples>"01/07/2020-05/01/2023"</examples>'
+        Output: '01/07/2020-05/01/2023'
+        
+        Input: '<DATE>01/07/2020-05/01/2023</DATE>'
+        Output: '01/07/2020-05/01/2023'"""
+    },
+    {
+        "name": "license_fee",
+        "retrieve_question": "Find text containing <PAYMENT> tags or numbers with currency symbols (€, $) near terms like 'fee', 'payment', 'amount', 'cost', or 'price'. Also look for numbers followed by /H or per hour.",
+        "generate_question": "Extract ONLY the exact payment amount with its currency symbol and rate (e.g., €3.000,00/H or €42.000,00). Return the full amount exactly as written, NOT including any hourly rates, just the total sums."
+    },
+    {
+        "name": "contract_status",
+        "retrieve_question": "Find text containing <STATUS> tags or <LEGAL> tags that indicate the agreement's current state. Also look for phrases like 'Read, Agreed and executed', 'terminated', 'active', or text about contract effectiveness and termination.",
+        "generate_question": """Based on the tagged text, determine and return ONLY one of these status values:
+        - 'Active' if the agreement is currently in force
+        - 'Terminated' if the agreement shows signs of being completed, executed, or ended (including phrases like 'Read, Agreed and executed')
+        - 'Draft' if the agreement appears to be in draft form
+        - 'Not found' if the status cannot be determined
+
+        For example:
+        - <STATUS>Read, Agreed and executed</STATUS> should return 'Terminated'
+        - <STATUS>Active</STATUS> should return 'Active'
+        - <LEGAL>This agreement is currently in effect</LEGAL> should return 'Active'"""
+    },
+    {
+        "name": "licensor",
+        "retrieve_question": """Find text containing:
+        1. <PARTY> tags with the word 'LICENSOR' in them
+        2. Text near phrases like 'hereinafter the "licensor"'
+        3. Text in the opening paragraphs where parties are first introduced
+        
+        Focus on the agreement's header section where parties are first defined.""",
+        
+        "generate_question": """Extract ONLY the company/entity name that is identified as the licensor. 
+        
+        Rules:
+        1. Look for text between <PARTY> tags that appears BEFORE 'hereinafter the "licensor"'
+        2. Return the exact name as it appears in the document
+        3. Do not include any additional text or explanations
+        4. If multiple matches exist, prioritize the one that appears first in the document header
+        5. If no clear licensor is found, return 'Not found'"""
+    },
+    {
+        "name": "licensee",
+        "retrieve_question": "Find text containing <COMPANY>RSG Media</COMPANY> where it is first introduced as a party in the agreement. Look specifically at the beginning of the document where parties are defined.",
+        "generate_question": "Return ONLY 'RSG Media' if it appears as a party to the agreement. Look for text patterns like 'hereinafter \"RSG Media\"' or where RSG Media is introduced as the second party after the licensor."
+    },
+    {
+        "name": "licensor_address",
+        "retrieve_question": "Find text containing <ADDRESS> tags that appear IMMEDIATELY AFTER the licensor is named and BEFORE the word 'AND' that introduces the second party.",
+        "generate_question": "Extract ONLY the first address that appears after the licensor is named and before the second party is introduced. Return exactly what appears between the <ADDRESS> tags in that location only."
+    },
+    {
+        "name": "licensee_address",
+        "retrieve_question": "Find text containing <ADDRESS> tags that appear near <COMPANY>RSG Media</COMPANY> tags.",
+        "generate_question": "Extract ONLY the complete address found between <ADDRESS> tags that appears with RSG Media's details."
+    },
+    {
+        "name": "document_language",
+        "retrieve_question": "Find text containing <PRODUCT> tags with 'Language' or 'language version' mentions, or <LEGAL> tags discussing document languages.",
+        "generate_question": "List ALL languages mentioned as official document versions. For Italian language mentions, return just 'Italian'. Return only the language name."
+    },
+    {
+        "name": "territory",
+        "retrieve_question": "Find text containing <TERRITORY> tags that specify geographical regions, especially near phrases like 'Licensed territory' or 'Territory'.",
+        "generate_question": "Extract ALL territories listed between <TERRITORY> tags. Format as a bullet list with each territory on a new line starting with '- '. Remove any '(the \"Territory\")' type annotations."
+    },
+    {
+        "name": "rights_granted",
+        "retrieve_question": """Find text containing <RIGHTS> tags or <PRODUCT> tags that describe distribution rights, licenses, or permissions. 
+        Look for:
+        - Text near terms like 'Distribution', 'rights granted', 'license', 'exploitation'
+        - Sections describing VOD, SVOD, PPV, EST, DTR, DTO
+        - Text containing <RIGHTS> tags that mention viewing or distribution methods
+        - Sections discussing theatrical, television, or home entertainment rights
+        - Text about linear and non-linear distribution
+        - Sections mentioning catch-up rights or near video on demand
+        Focus especially on text that appears in licensing terms or rights sections.""",
+        "generate_question": """Extract ALL rights granted, including distribution and exploitation rights. Format as a bullet list where each line starts with '- '.
+
+        Include rights such as:
+        - Download to Rent
+        - DTO (Download to Own)
+        - SVOD (Subscription Video on Demand)
+        - FVOD (Free Video on Demand)
+        - Near Video on Demand
+        - Catch Up rights
+        - PPV (Pay Per View)
+        - Television rights
+        - Theatrical rights
+        - Linear/Non-Linear Distribution
+        - EST (Electronic Sell-Through)
+        - Home Entertainment
+        - DTR (Download to Rent)
+
+        For example:
+        - Download to Rent
+        - SVOD
+        - Pay Per View
+        
+        Return ALL rights mentioned in the text, preserving the exact terminology used in the document. Include both abbreviated (e.g., 'PPV') and full forms if both are mentioned."""
+    },
+    {
+        "name": "contract_currency",
+        "retrieve_question": "Find text containing <PAYMENT> tags with € symbols or text containing the word 'Euro' or 'euro'.",
+        "generate_question": "Return ONLY 'EUR' if euro symbols (€) or the word 'euro/Euro' is found in the payment amounts or currency specifications."
+    },
+
+    {
+        "name": "due_date",
+        "retrieve_question": "Find text containing <TERM> tags near payment terms, especially looking for text that mentions payment timing, days, or due dates. Focus on text that appears near <PAYMENT> tags and mentions of invoice payment terms.",
+        "generate_question": """Extract ONLY the exact payment timing terms. If you find a specific payment schedule like '90 [ninety] days end month from the start avail date', return it exactly as written.
+        
+        For example:
+        - If you see '<TERM>90 [ninety] days end month</TERM> from the start avail date of the License Period' return exactly that
+        - If you see other specific payment timing terms, return them exactly as written
+        - If no specific payment timing is found, return 'Not found'
+        
+        Do not include the payment amounts or other terms - focus only on the timing/due date information."""
+    },
+    {
+        "name": "definitions",
+        "retrieve_question": """Find text containing definitions by looking for these specific patterns:
+        1. Text containing 'means' or 'shall mean' near <PRODUCT>, <TERM>, or <RIGHTS> tags
+        2. Text matching pattern '[Term]: means' or '[Term] shall mean'
+        3. Text containing 'Extended Catch-Up', 'Catch Up', 'Video on Demand', or similar technical terms followed by their definitions
+        4. Text blocks starting with bullet points or numbers that define technical terms
+        5. Text containing timing specifications like '48 hours', '30 day period' near technical terms
+        6. Sections titled 'Definitions', 'Terms', or 'Glossary'
+        7. Look for definitions related to:
+           - Catch-Up services
+           - Video on Demand
+           - Storage periods
+           - Viewing periods
+           - Playback rights
+           - Technical specifications
+        
+        Example text to match:
+        - "Extended Catch-Up: means the ability to store..."
+        - "<PRODUCT>Term</PRODUCT> means..."
+        - "1.1 [Term] shall mean..."
+        - "• Technical Term: means..."
+        """,
+        
+        "generate_question": """Extract and format ALL definitions as a bulleted list. For each definition:
+        1. Start with "• "
+        2. Include the term followed by ": " (colon and space)
+        3. Include the complete definition including all technical specifications and time periods
+        4. Preserve exact timing specifications (e.g., "48 hours", "30 day period")
+        5. Keep all technical details exactly as written
+        
+        Format each definition exactly like this:
+        • Term: complete definition
+        
+        Example of correct formatting:
+        • Extended Catch-Up: means the ability to store the Audiovisual Work on a connected device for unconnected playback within 48 hours from initial playback (Viewing Period) within a 30 day storage period
+        
+        Important:
+        - Include ALL definitions found, even if they appear outside a dedicated definitions section
+        - Keep technical specifications and timing details exactly as written
+        - Don't summarize or modify the definitions
+        - Include definitions even if they're part of numbered lists or bullet points
+        - Return 'Not found' if no definitions matching these patterns are found"""
+    }
+]
+
 # FastAPI endpoints
 @app.get("/")
 async def root():
@@ -245,10 +769,11 @@ async def upload_file(file: UploadFile = File(...)):
     
     file_path = UPLOAD_DIR / file.filename
     try:
-        # Save the file
+        # Stream the upload to disk in 1 MiB chunks so large PDFs never
+        # sit fully in memory and the event loop stays responsive
         with open(file_path, "wb") as buffer:
-            content = await file.read()
-            buffer.write(content)
+            while chunk := await file.read(1024 * 1024):
+                buffer.write(chunk)
         
         print(f"File saved to: {file_path}")
         
@@ -266,212 +791,11 @@ async def upload_file(file: UploadFile = File(...)):
             if os.path.exists(json_file):
                 print(f"Storing chunks from: {json_file}")
                 # Insert chunks with embeddings
-                document_id = insert_chunks(json_file)
+                document_id, _ = insert_chunks(json_file)
                 if document_id:
                     print(f"Processing variables for document_id: {document_id}")
-                    # Pass document_id to process_variables
-                    variables = [
-                        {
-                            "name": "deal_name",
-                            "retrieve_question": "Find text containing <PRODUCT> tags that describe the agreement type, or <LEGAL> tags that contain the word 'Agreement'. Focus on the first few paragraphs of the document.",
-                            "generate_question": "Extract ONLY the core agreement type (e.g. 'License Agreement', 'Service Agreement'). If you see <PRODUCT>License Agreement</PRODUCT> or <LEGAL>License Agreement</LEGAL>, return just 'License Agreement' without any party names or dates."
-                        },
-                        {
-                            "name": "license_period",
-                            "retrieve_question": """Find text containing:
-                            1. Tables or definitions that mention 'Pay License Period' or 'License Period'
-                            2. Look for <examples> tags containing date ranges
-                            3. Look for <DATE> tags containing date ranges
-                            4. Look for text that shows examples of license periods in DD/MM/YYYY-DD/MM/YYYY format
-                            5. Focus on text that defines or shows examples of license periods
-                            
-                            Example text to match:
-                            - <examples>"01/07/2020-05/01/2023"</examples>
-                            - <definition>Pay License Period</definition>
-                            - <DATE>01/07/2020-05/01/2023</DATE>
-                            - Tables showing license period dates""",
-                            
-                            "generate_question": """Extract ONLY the exact license period date range. 
-
-                            Rules:
-                            1. If you find a date range in <examples> tags within a Pay License Period definition, use that exact value
-                            2. If you find a date range in <DATE> tags, use that exact value
-                            3. Return the date range in exactly the format shown (e.g., '01/07/2020-05/01/2023')
-                            4. Do not modify or reformat the dates
-                            5. Do not include any explanatory text
-                            6. If multiple periods exist, prioritize the Pay License Period
-                            7. Look for date ranges in both <examples> and <DATE> tags
-                            8. If no specific date range is found, return 'Not found'
-
-                            Example matches:
-                            Input: '<examples>"01/07/2020-05/01/2023"</examples>'
-                            Output: '01/07/2020-05/01/2023'
-                            
-                            Input: '<DATE>01/07/2020-05/01/2023</DATE>'
-                            Output: '01/07/2020-05/01/2023'"""
-                        },
-                        {
-                            "name": "license_fee",
-                            "retrieve_question": "Find text containing <PAYMENT> tags or numbers with currency symbols (€, $) near terms like 'fee', 'payment', 'amount', 'cost', or 'price'. Also look for numbers followed by /H or per hour.",
-                            "generate_question": "Extract ONLY the exact payment amount with its currency symbol and rate (e.g., €3.000,00/H or €42.000,00). Return the full amount exactly as written, NOT including any hourly rates, just the total sums."
-                        },
-                        {
-                            "name": "contract_status",
-                            "retrieve_question": "Find text containing <STATUS> tags or <LEGAL> tags that indicate the agreement's current state. Also look for phrases like 'Read, Agreed and executed', 'terminated', 'active', or text about contract effectiveness and termination.",
-                            "generate_question": """Based on the tagged text, determine and return ONLY one of these status values:
-                            - 'Active' if the agreement is currently in force
-                            - 'Terminated' if the agreement shows signs of being completed, executed, or ended (including phrases like 'Read, Agreed and executed')
-                            - 'Draft' if the agreement appears to be in draft form
-                            - 'Not found' if the status cannot be determined
-
-                            For example:
-                            - <STATUS>Read, Agreed and executed</STATUS> should return 'Terminated'
-                            - <STATUS>Active</STATUS> should return 'Active'
-                            - <LEGAL>This agreement is currently in effect</LEGAL> should return 'Active'"""
-                        },
-                        {
-                            "name": "licensor",
-                            "retrieve_question": """Find text containing:
-                            1. <PARTY> tags with the word 'LICENSOR' in them
-                            2. Text near phrases like 'hereinafter the "licensor"'
-                            3. Text in the opening paragraphs where parties are first introduced
-                            
-                            Focus on the agreement's header section where parties are first defined.""",
-                            
-                            "generate_question": """Extract ONLY the company/entity name that is identified as the licensor. 
-                            
-                            Rules:
-                            1. Look for text between <PARTY> tags that appears BEFORE 'hereinafter the "licensor"'
-                            2. Return the exact name as it appears in the document
-                            3. Do not include any additional text or explanations
-                            4. If multiple matches exist, prioritize the one that appears first in the document header
-                            5. If no clear licensor is found, return 'Not found'"""
-                        },
-                        {
-                            "name": "licensee",
-                            "retrieve_question": "Find text containing <COMPANY>RSG Media</COMPANY> where it is first introduced as a party in the agreement. Look specifically at the beginning of the document where parties are defined.",
-                            "generate_question": "Return ONLY 'RSG Media' if it appears as a party to the agreement. Look for text patterns like 'hereinafter \"RSG Media\"' or where RSG Media is introduced as the second party after the licensor."
-                        },
-                        {
-                            "name": "licensor_address",
-                            "retrieve_question": "Find text containing <ADDRESS> tags that appear IMMEDIATELY AFTER the licensor is named and BEFORE the word 'AND' that introduces the second party.",
-                            "generate_question": "Extract ONLY the first address that appears after the licensor is named and before the second party is introduced. Return exactly what appears between the <ADDRESS> tags in that location only."
-                        },
-                        {
-                            "name": "licensee_address",
-                            "retrieve_question": "Find text containing <ADDRESS> tags that appear near <COMPANY>RSG Media</COMPANY> tags.",
-                            "generate_question": "Extract ONLY the complete address found between <ADDRESS> tags that appears with RSG Media's details."
-                        },
-                        {
-                            "name": "document_language",
-                            "retrieve_question": "Find text containing <PRODUCT> tags with 'Language' or 'language version' mentions, or <LEGAL> tags discussing document languages.",
-                            "generate_question": "List ALL languages mentioned as official document versions. For Italian language mentions, return just 'Italian'. Return only the language name."
-                        },
-                        {
-                            "name": "territory",
-                            "retrieve_question": "Find text containing <TERRITORY> tags that specify geographical regions, especially near phrases like 'Licensed territory' or 'Territory'.",
-                            "generate_question": "Extract ALL territories listed between <TERRITORY> tags. Format as a bullet list with each territory on a new line starting with '- '. Remove any '(the \"Territory\")' type annotations."
-                        },
-                        {
-                            "name": "rights_granted",
-                            "retrieve_question": """Find text containing <RIGHTS> tags or <PRODUCT> tags that describe distribution rights, licenses, or permissions. 
-                            Look for:
-                            - Text near terms like 'Distribution', 'rights granted', 'license', 'exploitation'
-                            - Sections describing VOD, SVOD, PPV, EST, DTR, DTO
-                            - Text containing <RIGHTS> tags that mention viewing or distribution methods
-                            - Sections discussing theatrical, television, or home entertainment rights
-                            - Text about linear and non-linear distribution
-                            - Sections mentioning catch-up rights or near video on demand
-                            Focus especially on text that appears in licensing terms or rights sections.""",
-                            "generate_question": """Extract ALL rights granted, including distribution and exploitation rights. Format as a bullet list where each line starts with '- '.
-
-                            Include rights such as:
-                            - Download to Rent
-                            - DTO (Download to Own)
-                            - SVOD (Subscription Video on Demand)
-                            - FVOD (Free Video on Demand)
-                            - Near Video on Demand
-                            - Catch Up rights
-                            - PPV (Pay Per View)
-                            - Television rights
-                            - Theatrical rights
-                            - Linear/Non-Linear Distribution
-                            - EST (Electronic Sell-Through)
-                            - Home Entertainment
-                            - DTR (Download to Rent)
-
-                            For example:
-                            - Download to Rent
-                            - SVOD
-                            - Pay Per View
-                            
-                            Return ALL rights mentioned in the text, preserving the exact terminology used in the document. Include both abbreviated (e.g., 'PPV') and full forms if both are mentioned."""
-                        },
-                        {
-                            "name": "contract_currency",
-                            "retrieve_question": "Find text containing <PAYMENT> tags with € symbols or text containing the word 'Euro' or 'euro'.",
-                            "generate_question": "Return ONLY 'EUR' if euro symbols (€) or the word 'euro/Euro' is found in the payment amounts or currency specifications."
-                        },
-
-                        {
-                            "name": "due_date",
-                            "retrieve_question": "Find text containing <TERM> tags near payment terms, especially looking for text that mentions payment timing, days, or due dates. Focus on text that appears near <PAYMENT> tags and mentions of invoice payment terms.",
-                            "generate_question": """Extract ONLY the exact payment timing terms. If you find a specific payment schedule like '90 [ninety] days end month from the start avail date', return it exactly as written.
-                            
-                            For example:
-                            - If you see '<TERM>90 [ninety] days end month</TERM> from the start avail date of the License Period' return exactly that
-                            - If you see other specific payment timing terms, return them exactly as written
-                            - If no specific payment timing is found, return 'Not found'
-                            
-                            Do not include the payment amounts or other terms - focus only on the timing/due date information."""
-                        },
-                        {
-                            "name": "definitions",
-                            "retrieve_question": """Find text containing definitions by looking for these specific patterns:
-                            1. Text containing 'means' or 'shall mean' near <PRODUCT>, <TERM>, or <RIGHTS> tags
-                            2. Text matching pattern '[Term]: means' or '[Term] shall mean'
-                            3. Text containing 'Extended Catch-Up', 'Catch Up', 'Video on Demand', or similar technical terms followed by their definitions
-                            4. Text blocks starting with bullet points or numbers that define technical terms
-                            5. Text containing timing specifications like '48 hours', '30 day period' near technical terms
-                            6. Sections titled 'Definitions', 'Terms', or 'Glossary'
-                            7. Look for definitions related to:
-                               - Catch-Up services
-                               - Video on Demand
-                               - Storage periods
-                               - Viewing periods
-                               - Playback rights
-                               - Technical specifications
-                            
-                            Example text to match:
-                            - "Extended Catch-Up: means the ability to store..."
-                            - "<PRODUCT>Term</PRODUCT> means..."
-                            - "1.1 [Term] shall mean..."
-                            - "• Technical Term: means..."
-                            """,
-                            
-                            "generate_question": """Extract and format ALL definitions as a bulleted list. For each definition:
-                            1. Start with "• "
-                            2. Include the term followed by ": " (colon and space)
-                            3. Include the complete definition including all technical specifications and time periods
-                            4. Preserve exact timing specifications (e.g., "48 hours", "30 day period")
-                            5. Keep all technical details exactly as written
-                            
-                            Format each definition exactly like this:
-                            • Term: complete definition
-                            
-                            Example of correct formatting:
-                            • Extended Catch-Up: means the ability to store the Audiovisual Work on a connected device for unconnected playback within 48 hours from initial playback (Viewing Period) within a 30 day storage period
-                            
-                            Important:
-                            - Include ALL definitions found, even if they appear outside a dedicated definitions section
-                            - Keep technical specifications and timing details exactly as written
-                            - Don't summarize or modify the definitions
-                            - Include definitions even if they're part of numbered lists or bullet points
-                            - Return 'Not found' if no definitions matching these patterns are found"""
-                        }
-                    ]
                     
-                    results = process_variables(variables, document_id)
+                    results = await process_variables(EXTRACTION_VARIABLES, document_id)
                     return {
                         "status": "success",
                         "document_id": document_id,
@@ -1,7 +1,15 @@
 import os
 import json
+import time
+import shutil
+import logging
+import hashlib
+import functools
 import configparser
-from supabase import create_client, Client
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+import httpx
+import numpy as np
+from supabase import create_client
 from openai import OpenAI
 from helpers.pdf_ingest import PDFProcessor  # Import the PDFProcessor
 from types import SimpleNamespace
@@ -14,72 +22,20 @@ if backend_dir not in sys.path:
 
 from helpers.enrichments import global_config  # Import global_config
 
-# Load configuration
-config = configparser.ConfigParser()
-config_path = os.path.join(os.path.dirname(__file__), 'config.ini')
-
 try:
-    if not os.path.exists(config_path):
-        raise FileNotFoundError(f"Config file not found at: {config_path}")
-        
-    config.read(config_path)
-    
-    # Check for required sections and keys without modifying them
-    required_sections = ['API_KEYS', 'SUPABASE']
-    required_keys = {
-        'API_KEYS': ['openai_api_key'],
-        'SUPABASE': ['supabase_url', 'supabase_key']
-    }
-    
-    for section in required_sections:
-        if section not in config:
-            raise KeyError(f"{section} section missing from config file")
-        for key in required_keys[section]:
-            if key not in config[section]:
-                raise KeyError(f"{key} missing from {section} section")
-        
-except Exception as e:
-    print(f"Configuration Error: {str(e)}")
-    raise
+    import ijson
+except ImportError:
+    ijson = None  # Fall back to materializing the file with json.load
 
-# Initialize OpenAI client with key from config
-openai_client = OpenAI(
-    api_key=config['API_KEYS']['openai_api_key']
-)
+try:
+    import psycopg
+except ImportError:
+    psycopg = None  # Bulk loads fall back to the REST client
 
-# Initialize Supabase client from config
-url: str = config['SUPABASE']['supabase_url']
-key: str = config['SUPABASE']['supabase_key']
-supabase: Client = create_client(url, key)
-
-# Create necessary directories
-base_dir = os.path.dirname(__file__)
-data_dir = os.path.join(base_dir, 'data')
-input_dir = os.path.join(data_dir, 'input')
-output_dir = os.path.join(data_dir, 'output')
-chunked_dir = os.path.join(output_dir, '02_chunked')
-
-# Create all directories
-for directory in [data_dir, input_dir, output_dir, chunked_dir]:
-    os.makedirs(directory, exist_ok=True)
-
-# Set up global configuration
-global_config.api_keys = SimpleNamespace()
-global_config.api_keys.openai_api_key = config['API_KEYS']['openai_api_key']
-global_config.api_keys.unstructured_api_key = config['API_KEYS'].get('unstructured_api_key', '')
-global_config.api_keys.unstructured_url = config['API_KEYS'].get('unstructured_url', 'https://api.unstructured.io/general/v0/general')
-
-global_config.directories = SimpleNamespace()
-global_config.directories.output_dir = output_dir
-global_config.directories.input_dir = input_dir
-global_config.directories.partitioned_dir = os.path.join(output_dir, '01_partitioned')
-global_config.directories.chunked_dir = chunked_dir
-global_config.directories.work_dir = os.path.join(output_dir, 'temp')
-
-# Create configuration namespace for PDFProcessor
-pdf_config = SimpleNamespace()
-pdf_config.api_keys = global_config.api_keys
-pdf_config.directories = global_config.directories
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None  # Fall back to fixed-size embedding batches
 
 """
 Document Chunking and Storage Module
@@ -90,6 +46,172 @@ Handles:
 - Storing chunks in Supabase
 """
 
+logger = logging.getLogger(__name__)
+
+@functools.lru_cache(maxsize=1)
+def _get_runtime():
+    """Load configuration and build shared clients on first use
+
+    Reading config.ini, constructing the OpenAI and Supabase clients,
+    creating the data directories and populating global_config used to
+    run at import time, which made importing this module slow and
+    side-effecting for callers that only need one function. The work now
+    happens once, on the first call that actually needs it.
+
+    Returns:
+        SimpleNamespace: Holds openai_client, supabase, pdf_config and
+            the ingest directories
+    """
+    # Load configuration
+    config = configparser.ConfigParser()
+    config_path = os.path.join(os.path.dirname(__file__), 'config.ini')
+
+    try:
+        if not os.path.exists(config_path):
+            raise FileNotFoundError(f"Config file not found at: {config_path}")
+
+        config.read(config_path)
+
+        # Check for required sections and keys without modifying them
+        required_sections = ['API_KEYS', 'SUPABASE']
+        required_keys = {
+            'API_KEYS': ['openai_api_key'],
+            'SUPABASE': ['supabase_url', 'supabase_key']
+        }
+
+        for section in required_sections:
+            if section not in config:
+                raise KeyError(f"{section} section missing from config file")
+            for key in required_keys[section]:
+                if key not in config[section]:
+                    raise KeyError(f"{key} missing from {section} section")
+
+    except Exception as e:
+        logger.error("Configuration Error: %s", e)
+        raise
+
+    # Shared pooled transport so concurrent embedding batches reuse
+    # keep-alive connections instead of opening a TLS handshake each
+    http_client = httpx.Client(
+        timeout=30,
+        limits=httpx.Limits(max_connections=50, max_keepalive_connections=20)
+    )
+
+    # Initialize OpenAI client with key from config
+    openai_client = OpenAI(
+        api_key=config['API_KEYS']['openai_api_key'],
+        http_client=http_client
+    )
+
+    # Initialize Supabase client from config
+    supabase = create_client(
+        config['SUPABASE']['supabase_url'],
+        config['SUPABASE']['supabase_key']
+    )
+
+    # Create necessary directories
+    base_dir = os.path.dirname(__file__)
+    data_dir = os.path.join(base_dir, 'data')
+    input_dir = os.path.join(data_dir, 'input')
+    output_dir = os.path.join(data_dir, 'output')
+    chunked_dir = os.path.join(output_dir, '02_chunked')
+    embed_cache_dir = os.path.join(data_dir, 'cache', 'embedding_batches')
+
+    for directory in [data_dir, input_dir, output_dir, chunked_dir, embed_cache_dir]:
+        os.makedirs(directory, exist_ok=True)
+
+    # Set up global configuration
+    global_config.api_keys = SimpleNamespace()
+    global_config.api_keys.openai_api_key = config['API_KEYS']['openai_api_key']
+    global_config.api_keys.unstructured_api_key = config['API_KEYS'].get('unstructured_api_key', '')
+    global_config.api_keys.unstructured_url = config['API_KEYS'].get('unstructured_url', 'https://api.unstructured.io/general/v0/general')
+
+    global_config.directories = SimpleNamespace()
+    global_config.directories.output_dir = output_dir
+    global_config.directories.input_dir = input_dir
+    global_config.directories.partitioned_dir = os.path.join(output_dir, '01_partitioned')
+    global_config.directories.chunked_dir = chunked_dir
+    global_config.directories.work_dir = os.path.join(output_dir, 'temp')
+
+    # Create configuration namespace for PDFProcessor
+    pdf_config = SimpleNamespace()
+    pdf_config.api_keys = global_config.api_keys
+    pdf_config.directories = global_config.directories
+
+    return SimpleNamespace(
+        config=config,
+        openai_client=openai_client,
+        supabase=supabase,
+        pdf_config=pdf_config,
+        input_dir=input_dir,
+        chunked_dir=chunked_dir,
+        embed_cache_dir=embed_cache_dir
+    )
+
+# Rows per bulk insert/upsert request against Supabase
+INSERT_BATCH_SIZE = 500
+
+# Chunks pulled from the JSON stream per embed-and-insert pass
+STREAM_BATCH_SIZE = 256
+
+# Embedding model used for both chunk storage and the cache key; must
+# stay in line with the query side in rag_functions and the vector(512)
+# columns on chunks
+EMBEDDING_MODEL = "text-embedding-3-small"
+EMBEDDING_DIMENSIONS = 512
+
+# Per-request packing limits for the embeddings endpoint: stay under
+# the 8191-token request cap with headroom, and under the input limit
+_MAX_BATCH_TOKENS = 7500
+_MAX_BATCH_TEXTS = 2048
+
+def _embedding_cache_key(text):
+    """Cache key for a text under the current embedding model.
+
+    The text is casefolded and whitespace-collapsed before hashing so
+    near-duplicates that differ only in spacing, line breaks or casing
+    share a key and reuse the cached embedding instead of re-embedding.
+    """
+    normalized = " ".join(text.split()).casefold()
+    return hashlib.sha256((EMBEDDING_MODEL + "\0" + normalized).encode("utf-8")).hexdigest()
+
+def _load_cached_embeddings(hashes):
+    """Fetch cached embeddings for the given keys from Supabase
+
+    Args:
+        hashes: List of cache keys to look up
+
+    Returns:
+        dict: Mapping of cache key to embedding for every hit
+    """
+    supabase = _get_runtime().supabase
+    cached = {}
+    for start in range(0, len(hashes), INSERT_BATCH_SIZE):
+        batch = hashes[start:start + INSERT_BATCH_SIZE]
+        try:
+            response = supabase.table("embedding_cache").select("hash, embedding").in_("hash", batch).execute()
+        except Exception as e:
+            logger.error("Error reading embedding cache: %s", e)
+            return cached
+        for row in response.data or []:
+            embedding = row["embedding"]
+            # Vector columns come back as their text representation
+            if isinstance(embedding, str):
+                embedding = json.loads(embedding)
+            cached[row["hash"]] = embedding
+    return cached
+
+def _store_cached_embeddings(rows):
+    """Persist freshly generated embeddings to the cache table."""
+    supabase = _get_runtime().supabase
+    for start in range(0, len(rows), INSERT_BATCH_SIZE):
+        batch = rows[start:start + INSERT_BATCH_SIZE]
+        try:
+            supabase.table("embedding_cache").upsert(batch, on_conflict="hash").execute()
+        except Exception as e:
+            logger.error("Error writing embedding cache: %s", e)
+            return
+
 def encode_text_to_vector(text):
     """Generate vector embedding for text using OpenAI
     
@@ -100,65 +222,305 @@ def encode_text_to_vector(text):
         list: Vector embedding array
     """
     try:
-        print(f"Generating embedding for text: {text[:100]}...")  # Debug line
-        response = openai_client.embeddings.create(
-            model="text-embedding-ada-002",
-            input=text
+        logger.debug("Generating embedding for text: %.100s...", text)
+        response = _get_runtime().openai_client.embeddings.create(
+            model=EMBEDDING_MODEL,
+            input=text,
+            dimensions=EMBEDDING_DIMENSIONS
         )
         if response.data and response.data[0].embedding:
-            print(f"Successfully generated embedding of length: {len(response.data[0].embedding)}")  # New debug line
+            logger.debug("Successfully generated embedding of length: %d", len(response.data[0].embedding))
             return response.data[0].embedding
         else:
-            print("No embedding data in response")
+            logger.warning("No embedding data in response")
             return None
     except Exception as e:
-        print(f"Error generating embedding: {str(e)}")
+        logger.error("Error generating embedding: %s", e)
         return None
 
+def _quantize_embedding(embedding):
+    """Normalize an embedding and round it to float16 precision
+
+    Rounding to fp16 halves the bytes shipped to the database with
+    negligible cosine-similarity loss, and matches the halfvec column
+    the similarity search runs against.
+
+    Args:
+        embedding: Raw float embedding from the API
+
+    Returns:
+        list: Unit-normalized embedding at float16 precision
+    """
+    vector = np.asarray(embedding, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    if norm:
+        vector /= norm
+    return vector.astype(np.float16).astype(float).tolist()
+
+def _batch_cache_path(batch):
+    """Local cache file for a batch, keyed on model and batch content."""
+    key = hashlib.sha256(
+        (EMBEDDING_MODEL + "\0" + "\0".join(batch)).encode("utf-8")
+    ).hexdigest()
+    return os.path.join(_get_runtime().embed_cache_dir, f"{key}.json")
+
+def _embed_batch(batch, max_retries=5):
+    """Embed one batch of texts, backing off and retrying on rate limits.
+
+    Whole-batch responses are cached on disk keyed by the batch content
+    hash, so re-ingesting an identical corpus (common during dev
+    iteration) is a local file read instead of an API call.
+
+    Args:
+        batch: List of texts for a single API request
+        max_retries: How many times to retry a rate-limited request
+
+    Returns:
+        list: One embedding per text in the batch
+    """
+    cache_path = _batch_cache_path(batch)
+    if os.path.exists(cache_path):
+        try:
+            with open(cache_path, 'r') as f:
+                return json.load(f)
+        except Exception as e:
+            logger.warning("Could not read batch cache %s: %s", cache_path, e)
+
+    openai_client = _get_runtime().openai_client
+    delay = 1
+    for attempt in range(max_retries):
+        try:
+            response = openai_client.embeddings.create(
+                model=EMBEDDING_MODEL,
+                input=batch,
+                dimensions=EMBEDDING_DIMENSIONS
+            )
+            embeddings = [item.embedding for item in response.data]
+            try:
+                with open(cache_path, 'w') as f:
+                    json.dump(embeddings, f)
+            except Exception as e:
+                logger.warning("Could not write batch cache %s: %s", cache_path, e)
+            return embeddings
+        except Exception as e:
+            message = str(e)
+            if '429' not in message and 'rate limit' not in message.lower():
+                raise
+            logger.warning("Rate limited, retrying in %ds (attempt %d/%d)", delay, attempt + 1, max_retries)
+            time.sleep(delay)
+            delay *= 2
+    raise RuntimeError(f"Still rate limited after {max_retries} retries")
+
+@functools.lru_cache(maxsize=1)
+def _get_encoder():
+    """Tokenizer for the embedding model, built once per process
+
+    encoding_for_model reloads the BPE data on every call, which costs
+    hundreds of milliseconds, so the encoder is cached as a singleton.
+    """
+    return tiktoken.encoding_for_model(EMBEDDING_MODEL)
+
+def _build_batches(texts, batch_size):
+    """Slice texts into per-request embedding batches
+
+    With tiktoken available, texts are packed greedily until the
+    request token budget (or input-count limit) is reached, so tiny
+    chunks fill each request and oversized ones no longer blow the
+    per-request token cap. Without it, fixed-size slices are used.
+
+    Args:
+        texts: Texts to batch, in order
+        batch_size: Slice size for the fixed-size fallback
+
+    Returns:
+        list: (start offset, texts) pairs covering the input in order
+    """
+    if tiktoken is None:
+        return [(start, texts[start:start + batch_size])
+                for start in range(0, len(texts), batch_size)]
+
+    # Tokenize the whole input in one parallel call; encode_ordinary_batch
+    # releases the GIL across its worker threads
+    token_counts = [len(tokens) for tokens in
+                    _get_encoder().encode_ordinary_batch(texts, num_threads=8)]
+
+    batches = []
+    batch_start = 0
+    current = []
+    current_tokens = 0
+    for idx, text in enumerate(texts):
+        n_tokens = token_counts[idx]
+        if current and (current_tokens + n_tokens > _MAX_BATCH_TOKENS
+                        or len(current) >= _MAX_BATCH_TEXTS):
+            batches.append((batch_start, current))
+            batch_start = idx
+            current = []
+            current_tokens = 0
+        current.append(text)
+        current_tokens += n_tokens
+    if current:
+        batches.append((batch_start, current))
+    return batches
+
+def _embed_all(texts, batch_size, max_workers):
+    """Embed texts through the API in concurrent, order-preserving batches."""
+    embeddings = [None] * len(texts)
+    batches = _build_batches(texts, batch_size)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(_embed_batch, batch): start
+                   for start, batch in batches}
+        for future in as_completed(futures):
+            start = futures[future]
+            try:
+                batch_embeddings = future.result()
+                embeddings[start:start + len(batch_embeddings)] = batch_embeddings
+            except Exception as e:
+                logger.error("Error generating embeddings for batch starting at %d: %s", start, e)
+
+    return embeddings
+
+def encode_texts_to_vectors(texts, batch_size=256, max_workers=5):
+    """Generate embeddings for many texts in batched API calls
+
+    Texts already present in the embedding_cache table are served from
+    there, keyed on a hash of the model name and text, so re-ingesting a
+    document never re-embeds unchanged chunks. The remaining texts go to
+    the embeddings endpoint in batches, with several batches kept in
+    flight at once since each request spends most of its time waiting on
+    the API; results are written back by position so input order is
+    preserved.
+
+    Args:
+        texts: List of text contents to embed
+        batch_size: Number of texts per API request
+        max_workers: Number of batches kept in flight at once
+
+    Returns:
+        list: One embedding per text, in input order (None entries for
+            texts whose batch failed)
+    """
+    embeddings = [None] * len(texts)
+    keys = [_embedding_cache_key(text) for text in texts]
+    cached = _load_cached_embeddings(list(set(keys)))
+
+    # Dedupe by cache key so repeated texts (boilerplate headers,
+    # footers and the like) are embedded once and fanned back out
+    pending = []
+    unique_slots = {}
+    for idx, key in enumerate(keys):
+        if key in cached:
+            embeddings[idx] = cached[key]
+        else:
+            pending.append(idx)
+            unique_slots.setdefault(key, len(unique_slots))
+
+    if cached:
+        logger.info("Embedding cache served %d of %d texts", len(texts) - len(pending), len(texts))
+
+    if pending:
+        unique_texts = [None] * len(unique_slots)
+        for idx in pending:
+            unique_texts[unique_slots[keys[idx]]] = texts[idx]
+
+        if len(unique_texts) < len(pending):
+            logger.info("Deduplicated %d texts down to %d unique", len(pending), len(unique_texts))
+
+        fresh = _embed_all(unique_texts, batch_size, max_workers)
+
+        new_rows = {}
+        for idx in pending:
+            key = keys[idx]
+            embedding = fresh[unique_slots[key]]
+            embeddings[idx] = embedding
+            if embedding:
+                new_rows[key] = {
+                    "hash": key,
+                    "model": EMBEDDING_MODEL,
+                    "embedding": embedding
+                }
+
+        if new_rows:
+            _store_cached_embeddings(list(new_rows.values()))
+
+    return embeddings
+
 def get_or_create_document_id(filename):
     """Get or create a document record in Supabase
-    
+
+    A single upsert against the unique filename constraint replaces the
+    old select-then-insert, which took two round-trips on the miss path
+    and raced when PDFs were processed concurrently.
+
     Args:
         filename: Name of document file
-        
+
     Returns:
         int: Document ID from database
     """
-    response = supabase.table("documents").select("document_id").eq("filename", filename).execute()
-    if response.data:
-        return response.data[0]["document_id"]
-    else:
-        insert_response = supabase.table("documents").insert({"filename": filename}).execute()
-        return insert_response.data[0]["document_id"]
+    supabase = _get_runtime().supabase
+    response = supabase.table("documents").upsert(
+        {"filename": filename}, on_conflict="filename"
+    ).execute()
+    return response.data[0]["document_id"]
+
+# Rows fetched per page when scanning for chunks without embeddings
+_FETCH_PAGE_SIZE = 1000
 
 def fetch_chunks_without_embeddings(document_id):
-    """Fetch chunks that have NULL embeddings for the given document."""
-    response = supabase.table("chunks").select("*").eq("document_id", document_id).is_("embedding", None).execute()
-    return response.data
+    """Fetch chunks that have NULL embeddings for the given document
+
+    Only id, element_id and text come back — the embedding write-back
+    needs nothing else, and select("*") dragged the full orig_elements
+    payload over the wire — and rows are paginated so large documents
+    do not arrive as one response.
+
+    Args:
+        document_id: ID of document to scan
+
+    Returns:
+        list: Chunk dicts with id, element_id and text keys
+    """
+    supabase = _get_runtime().supabase
+    chunks = []
+    offset = 0
+    while True:
+        response = supabase.table("chunks").select("id,element_id,text") \
+            .eq("document_id", document_id).is_("embedding", None) \
+            .range(offset, offset + _FETCH_PAGE_SIZE - 1).execute()
+        page = response.data or []
+        chunks.extend(page)
+        if len(page) < _FETCH_PAGE_SIZE:
+            return chunks
+        offset += _FETCH_PAGE_SIZE
 
 def update_chunk_embedding(chunk_id, embedding):
     """Update the embedding column for the specified chunk."""
+    supabase = _get_runtime().supabase
     try:
-        print(f"Attempting to update chunk {chunk_id} with embedding of length {len(embedding)}")  # New debug line
+        logger.debug("Attempting to update chunk %s with embedding of length %d", chunk_id, len(embedding))
+        quantized = _quantize_embedding(embedding)
         response = supabase.table("chunks").update({
-            "embedding": embedding
+            "embedding": quantized,
+            "embedding_h": quantized
         }).eq("id", chunk_id).execute()
         
         if response.data:
-            print(f"Successfully updated embedding for chunk ID {chunk_id}")
-            # Verify the update
-            check = supabase.table("chunks").select("embedding").eq("id", chunk_id).execute()
-            if check.data and check.data[0]["embedding"]:
-                print(f"Verified: Embedding is stored for chunk {chunk_id}")
-            else:
-                print(f"Warning: Embedding may not have been stored properly for chunk {chunk_id}")
+            logger.debug("Successfully updated embedding for chunk ID %s", chunk_id)
+            # Verify read costs a second round-trip per chunk, so it is
+            # opt-in for debugging only
+            if os.getenv("STORE_CHUNKS_VERIFY") == "1":
+                check = supabase.table("chunks").select("embedding").eq("id", chunk_id).execute()
+                if check.data and check.data[0]["embedding"]:
+                    logger.info("Verified: Embedding is stored for chunk %s", chunk_id)
+                else:
+                    logger.warning("Embedding may not have been stored properly for chunk %s", chunk_id)
         else:
-            print(f"No data returned when updating chunk {chunk_id}")
+            logger.warning("No data returned when updating chunk %s", chunk_id)
             if response.error:
-                print(f"Error details: {response.error}")
+                logger.error("Error details: %s", response.error)
     except Exception as e:
-        print(f"Error updating embedding for chunk ID {chunk_id}: {str(e)}")
-        print(f"Error type: {type(e)}")  # New debug line
+        logger.error("Error updating embedding for chunk ID %s: %s (%s)", chunk_id, e, type(e))
 
 def process_embeddings(document_id):
     """Generate and store embeddings for document chunks
@@ -166,154 +528,345 @@ def process_embeddings(document_id):
     Args:
         document_id: ID of document to process
     """
-    print(f"\n=== Starting embedding processing for document_id: {document_id} ===")
-    
+    logger.info("Starting embedding processing for document_id: %s", document_id)
+
     chunks = fetch_chunks_without_embeddings(document_id)
-    print(f"Fetched {len(chunks) if chunks else 0} chunks without embeddings")
-    
+    logger.info("Fetched %d chunks without embeddings", len(chunks) if chunks else 0)
+
     if not chunks:
-        print("All chunks already have embeddings.")
+        logger.info("All chunks already have embeddings.")
         return
     
-    for chunk in chunks:
-        print(f"\nProcessing chunk ID {chunk['id']}:")
-        print(f"Text preview: {chunk['text'][:100]}...")
-        
+    # Embed all chunk texts in batched requests instead of per chunk
+    embeddings = encode_texts_to_vectors([chunk['text'] for chunk in chunks])
+
+    updates = []
+    for chunk, embedding in zip(chunks, embeddings):
+        if embedding:
+            quantized = _quantize_embedding(embedding)
+            # element_id and text are NOT NULL, and Postgres checks that
+            # on the candidate row before ON CONFLICT kicks in, so the
+            # upsert payload has to carry them alongside the embedding
+            updates.append({"id": chunk['id'],
+                            "element_id": chunk['element_id'],
+                            "text": chunk['text'],
+                            "embedding": quantized,
+                            "embedding_h": quantized})
+        else:
+            logger.warning("Failed to generate embedding for chunk %s", chunk['id'])
+
+    # Write the embeddings back in batched upserts keyed on id instead
+    # of one update round trip per chunk
+    supabase = _get_runtime().supabase
+    for start in range(0, len(updates), INSERT_BATCH_SIZE):
+        batch = updates[start:start + INSERT_BATCH_SIZE]
         try:
-            embedding = encode_text_to_vector(chunk['text'])
-            
-            if embedding:
-                print(f"Generated embedding of length: {len(embedding)}")
-                update_chunk_embedding(chunk['id'], embedding)
-            else:
-                print(f"WARNING: Failed to generate embedding for chunk {chunk['id']}")
-                
+            supabase.table("chunks").upsert(batch, on_conflict="id").execute()
+            logger.debug("Stored embeddings for %d chunks", len(batch))
         except Exception as e:
-            print(f"ERROR processing chunk {chunk['id']}: {str(e)}")
-            print(f"Error type: {type(e)}")
+            logger.error("Error storing embeddings for batch starting at %d: %s", start, e)
             continue
-    
+
     # Verify after processing
     remaining_chunks = fetch_chunks_without_embeddings(document_id)
-    print(f"\nAfter processing: {len(remaining_chunks) if remaining_chunks else 0} chunks still without embeddings")
+    logger.info("After processing: %d chunks still without embeddings", len(remaining_chunks) if remaining_chunks else 0)
+
+# Columns written for each chunk row, shared by the COPY and REST paths
+_CHUNK_COLUMNS = (
+    "element_id", "text", "document_id", "filetype", "languages",
+    "start_page_number", "end_page_number", "orig_elements",
+    "source_file", "embedding", "embedding_h"
+)
+
+def _vector_literal(vector):
+    """Render an embedding as a pgvector text literal for COPY."""
+    if vector is None:
+        return None
+    return "[" + ",".join(repr(value) for value in vector) + "]"
+
+def _copy_rows_direct(rows):
+    """Bulk-load chunk rows over a direct Postgres COPY
+
+    PostgREST wraps every insert in HTTP plus JSON parsing; COPY streams
+    the rows over one connection and is an order of magnitude faster for
+    bulk loads. Requires psycopg and a DATABASE_URL pointing at the
+    Supabase Postgres instance.
+
+    Args:
+        rows: Chunk row dicts as built by _insert_chunk_batch
+
+    Returns:
+        int or None: Rows copied, or None when COPY is unavailable or
+            failed and the caller should fall back to the REST insert
+    """
+    dsn = os.getenv("DATABASE_URL")
+    if psycopg is None or not dsn or not rows:
+        return None
+
+    try:
+        with psycopg.connect(dsn) as conn:
+            with conn.cursor() as cur:
+                statement = f"COPY chunks ({', '.join(_CHUNK_COLUMNS)}) FROM STDIN"
+                with cur.copy(statement) as copy:
+                    for row in rows:
+                        copy.write_row(tuple(
+                            _vector_literal(row[column])
+                            if column in ("embedding", "embedding_h")
+                            else row[column]
+                            for column in _CHUNK_COLUMNS
+                        ))
+        return len(rows)
+    except Exception as e:
+        logger.warning("Direct COPY failed, falling back to REST insert: %s", e)
+        return None
+
+def _insert_chunk_batch(items, document_id, filename):
+    """Embed and bulk-insert one batch of streamed chunk items
+
+    Args:
+        items: Chunk dicts pulled off the JSON stream
+        document_id: Document the chunks belong to
+        filename: Source filename recorded on each row
+
+    Returns:
+        tuple: (rows inserted, rows inserted without an embedding)
+    """
+    embeddings = encode_texts_to_vectors([item["text"] for item in items])
+
+    rows = []
+    for item, embedding in zip(items, embeddings):
+        metadata = item["metadata"]
+        quantized = _quantize_embedding(embedding) if embedding else None
+        rows.append({
+            "element_id": item["element_id"],
+            "text": item["text"],
+            "document_id": document_id,
+            "filetype": metadata.get("filetype"),
+            "languages": metadata.get("languages", []),
+            "start_page_number": metadata.get("page_number"),
+            "end_page_number": metadata.get("page_number"),
+            "orig_elements": metadata.get("orig_elements"),
+            "source_file": filename,
+            "embedding": quantized,
+            "embedding_h": quantized  # halfvec column used by search
+        })
+
+    missing_embeddings = sum(1 for row in rows if row["embedding"] is None)
+
+    # Prefer a direct COPY when psycopg and DATABASE_URL are available
+    copied = _copy_rows_direct(rows)
+    if copied is not None:
+        logger.debug("Copied %d chunks over direct Postgres connection", copied)
+        return copied, missing_embeddings
+
+    # Insert rows in bulk batches instead of one request per chunk
+    supabase = _get_runtime().supabase
+    chunks_inserted = 0
+    for start in range(0, len(rows), INSERT_BATCH_SIZE):
+        batch = rows[start:start + INSERT_BATCH_SIZE]
+        try:
+            response = supabase.table("chunks").insert(batch).execute()
+
+            if response.data:
+                chunks_inserted += len(response.data)
+                logger.debug("Inserted %d chunks from batch", chunks_inserted)
+            else:
+                logger.warning("No data returned when inserting batch starting at %d", start)
+
+        except Exception as e:
+            logger.error("Error inserting batch starting at %d: %s", start, e)
+            continue
+
+    return chunks_inserted, missing_embeddings
 
 def insert_chunks(file_path):
     """Insert document chunks into Supabase with embeddings
-    
+
+    Chunks are parsed off the JSON file as a stream (when ijson is
+    available) and processed in fixed-size batches, so peak memory no
+    longer scales with the number of chunks in the document.
+
     Args:
         file_path: Path to JSON chunks file
-        
+
     Returns:
-        int: Document ID for inserted chunks
+        tuple: (document ID for inserted chunks, number of chunks that
+            went in without an embedding and still need one)
     """
     try:
-        print(f"Reading chunks from {file_path}")
-        with open(file_path, 'r') as file:
-            json_data = json.load(file)
-            
-        if not json_data:
-            print(f"Warning: Empty JSON data from {file_path}")
-            return None
-            
-        print(f"Found {len(json_data)} chunks to process")
+        logger.info("Reading chunks from %s", file_path)
 
-        # Get or create document_id
         filename = os.path.basename(file_path).replace('.json', '')
-        document_id = get_or_create_document_id(filename)
-        print(f"Using document_id: {document_id} for file: {filename}")
-
+        document_id = None
         chunks_inserted = 0
-        for item in json_data:
-            try:
-                # Generate embedding for the chunk text
-                embedding = encode_text_to_vector(item["text"])
-                
-                metadata = item["metadata"]
-                chunk_data = {
-                    "element_id": item["element_id"],
-                    "text": item["text"],
-                    "document_id": document_id,
-                    "filetype": metadata.get("filetype"),
-                    "languages": metadata.get("languages", []),
-                    "start_page_number": metadata.get("page_number"),
-                    "end_page_number": metadata.get("page_number"),
-                    "orig_elements": metadata.get("orig_elements"),
-                    "source_file": filename,
-                    "embedding": embedding  # Add embedding here
-                }
-                
-                response = supabase.table("chunks").insert(chunk_data).execute()
+        missing_embeddings = 0
 
-                if response.data:
-                    chunks_inserted += 1
-                    print(f"Inserted chunk {chunks_inserted} with embedding")
-                else:
-                    print(f"Warning: No data returned when inserting chunk {item['element_id']}")
+        with open(file_path, 'rb') as file:
+            if ijson is not None:
+                items = ijson.items(file, 'item')
+            else:
+                # Without ijson the whole document is materialized
+                items = iter(json.load(file))
 
-            except Exception as e:
-                print(f"Error processing chunk {item['element_id']}: {str(e)}")
-                continue
+            # Pull fixed-size batches off the stream so memory stays at
+            # O(batch) instead of holding every chunk at once
+            batch = []
+            for item in items:
+                batch.append(item)
+                if len(batch) >= STREAM_BATCH_SIZE:
+                    if document_id is None:
+                        document_id = get_or_create_document_id(filename)
+                        logger.info("Using document_id: %s for file: %s", document_id, filename)
+                    inserted, missing = _insert_chunk_batch(batch, document_id, filename)
+                    chunks_inserted += inserted
+                    missing_embeddings += missing
+                    batch = []
+
+            if batch:
+                if document_id is None:
+                    document_id = get_or_create_document_id(filename)
+                    logger.info("Using document_id: %s for file: %s", document_id, filename)
+                inserted, missing = _insert_chunk_batch(batch, document_id, filename)
+                chunks_inserted += inserted
+                missing_embeddings += missing
+
+        if document_id is None:
+            logger.warning("Empty JSON data from %s", file_path)
+            return None, 0
 
-        print(f"Successfully inserted {chunks_inserted} new chunks with embeddings")
-        return document_id
+        logger.info("Successfully inserted %d new chunks (%d still need embeddings)",
+                    chunks_inserted, missing_embeddings)
+        return document_id, missing_embeddings
 
     except Exception as e:
-        print(f"Error in insert_chunks: {str(e)}")
+        logger.error("Error in insert_chunks: %s", e)
         raise
 
+def _process_one_pdf(pdf_file):
+    """Partition, chunk and store a single PDF end to end
+
+    Runs inside a worker process; the lazy runtime singleton rebuilds
+    the config and API clients per worker, so nothing unpicklable has
+    to cross the process boundary.
+
+    process_pdfs is not scoped to a single file — its indexer walks the
+    whole input directory and enrichment rewrites every partitioned
+    JSON it finds — so concurrent workers sharing directories would
+    re-process and clobber each other's files. Each worker therefore
+    stages its PDF into a private workspace, redirects the
+    process-local directory config there, and merges the artifacts back
+    into the shared output tree when the pipeline finishes.
+
+    Args:
+        pdf_file: PDF filename inside the input directory
+
+    Returns:
+        bool: True if chunks were stored for the file
+    """
+    rt = _get_runtime()
+
+    pdf_path = os.path.join(rt.input_dir, pdf_file)
+    if not os.path.exists(pdf_path):
+        logger.warning("PDF file not found: %s", pdf_path)
+        return False
+
+    # Initialize PDF processor with config
+    pdf_processor = PDFProcessor()
+
+    # Set both configurations
+    pdf_processor.config = rt.pdf_config
+    pdf_processor.global_config = global_config
+
+    # Point both the processor and the shared directory namespace (read
+    # at call time by annotation and enrichment) at the private
+    # workspace; this process owns its copy of the config, so other
+    # workers are unaffected
+    shared_output = pdf_processor.output_dir
+    worker_root = os.path.join(shared_output, 'workers',
+                               os.path.splitext(pdf_file)[0])
+    worker_input = os.path.join(worker_root, 'input')
+    worker_output = os.path.join(worker_root, 'output')
+
+    pdf_processor.output_dir = worker_output
+    pdf_processor.partitioned_dir = os.path.join(worker_output, '01_partitioned')
+    pdf_processor.chunked_dir = os.path.join(worker_output, '02_chunked')
+    pdf_processor.work_dir = os.path.join(worker_output, 'temp')
+
+    dirs = pdf_processor.global_config.directories
+    dirs.input_dir = worker_input
+    dirs.output_dir = worker_output
+
+    for directory in (worker_input, pdf_processor.partitioned_dir,
+                      pdf_processor.chunked_dir, pdf_processor.work_dir):
+        os.makedirs(directory, exist_ok=True)
+
+    try:
+        shutil.copy2(pdf_path, os.path.join(worker_input, pdf_file))
+
+        logger.info("Processing: %s", pdf_file)
+        pdf_processor.process_pdfs(worker_input, [pdf_file])
+
+        # Merge this worker's artifacts into the shared output tree;
+        # every artifact name derives from the PDF name, so files from
+        # different workers never collide
+        shutil.copytree(worker_output, shared_output, dirs_exist_ok=True)
+    finally:
+        shutil.rmtree(worker_root, ignore_errors=True)
+
+    # Get JSON file path
+    json_file = os.path.join(rt.chunked_dir, f"{pdf_file}.json")
+    logger.debug("Looking for chunks file at: %s", json_file)
+
+    if not os.path.exists(json_file):
+        logger.warning("No chunks file found at: %s", json_file)
+        return False
+
+    logger.info("Processing chunks from: %s", json_file)
+    document_id, missing_embeddings = insert_chunks(json_file)
+
+    # Chunks are embedded on insert, so the repair pass only
+    # runs when some rows went in without an embedding
+    if document_id and missing_embeddings:
+        process_embeddings(document_id)
+    return True
+
 def main():
     """Main function."""
     try:
-        # Initialize PDF processor with config
-        pdf_processor = PDFProcessor()
-        
-        # Set both configurations
-        pdf_processor.config = pdf_config
-        pdf_processor.global_config = global_config
-        
+        rt = _get_runtime()
+
         # Create all required directories
         for directory in [
-            pdf_config.directories.output_dir,
-            pdf_config.directories.input_dir,
-            pdf_config.directories.partitioned_dir,
-            pdf_config.directories.chunked_dir,
-            pdf_config.directories.work_dir
+            rt.pdf_config.directories.output_dir,
+            rt.pdf_config.directories.input_dir,
+            rt.pdf_config.directories.partitioned_dir,
+            rt.pdf_config.directories.chunked_dir,
+            rt.pdf_config.directories.work_dir
         ]:
             os.makedirs(directory, exist_ok=True)
-            print(f"Ensuring directory exists: {directory}")
-        
+            logger.debug("Ensuring directory exists: %s", directory)
+
         # Get list of PDFs in input directory
-        pdf_files = [f for f in os.listdir(input_dir) if f.endswith('.pdf')]
-        
+        pdf_files = [f for f in os.listdir(rt.input_dir) if f.endswith('.pdf')]
+
         if not pdf_files:
-            print("No PDF files found in input directory")
+            logger.info("No PDF files found in input directory")
             return
-            
-        # Process each PDF file
-        for pdf_file in pdf_files:
-            pdf_path = os.path.join(input_dir, pdf_file)
-            if not os.path.exists(pdf_path):
-                print(f"PDF file not found: {pdf_path}")
-                continue
-                
-            print(f"Processing: {pdf_file}")
-            pdf_processor.process_pdfs(input_dir, [pdf_file])
-            
-            # Get JSON file path
-            json_file = os.path.join(chunked_dir, f"{pdf_file}.json")
-            print(f"Looking for chunks file at: {json_file}")
-            
-            if os.path.exists(json_file):
-                print(f"\nProcessing chunks from: {json_file}")
-                document_id = insert_chunks(json_file)
-                
-                # Add embedding processing
-                if document_id:
-                    process_embeddings(document_id)
-            else:
-                print(f"No chunks file found at: {json_file}")
+
+        # Partitioning is CPU-bound, so each PDF gets its own worker
+        # process instead of being handled one after another
+        max_workers = min(len(pdf_files), os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = {executor.submit(_process_one_pdf, pdf_file): pdf_file
+                       for pdf_file in pdf_files}
+            for future in as_completed(futures):
+                pdf_file = futures[future]
+                try:
+                    future.result()
+                except Exception as e:
+                    logger.error("Error processing %s: %s", pdf_file, e)
     except Exception as e:
-        print(f"Error in main: {str(e)}")
+        logger.error("Error in main: %s", e)
         raise
 
 if __name__ == "__main__":